@@ -2,13 +2,21 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
+from sklearn.metrics import accuracy_score, brier_score_loss, classification_report, confusion_matrix, roc_auc_score
 import xgboost as xgb
 import pickle
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import joblib
+from tuning import tune
+from model_io import (BUNDLE_NAME, IMPORTANCE_NAME, TRAIN_PARAM_KEYS, write_bundle,
+                      write_feature_importance)
+from risk_tiers import TIER_EDGES, TIER_NAMES
+
+# Saved models must spread patients across the risk tiers and be roughly calibrated
+MIN_PROB_SPREAD = 0.5          # 95th minus 5th percentile of test-set probabilities
+MAX_CALIBRATION_ERROR = 0.1    # expected calibration error over 10 probability bins
 
 # ---- 1. Load & Preprocess Data ----
 def load_data():
@@ -32,7 +40,16 @@ def load_data():
     return X_train, X_test, y_train, y_test, scaler, df
 
 # ---- 2. Hyperparameter Tuning (XGBoost) ----
-def train_xgboost(X_train, y_train):
+def train_xgboost(X_train, y_train, strategy=None, n_jobs=None):
+    # Parallel early-stopping search (grid / random / halving), see tuning.py
+    if strategy:
+        result = tune(X_train, y_train, strategy, n_jobs=n_jobs)
+        model = xgb.XGBClassifier(objective='binary:logistic', random_state=42,
+                                  **result["best_params"])
+        model.fit(X_train, y_train)
+        print("Best params:", result["best_params"])
+        return model
+
     param_grid = {
         'n_estimators': [100, 200],
         'max_depth': [3, 6, 9],
@@ -73,16 +90,57 @@ def evaluate_model(model, X_test, y_test):
     fig = px.bar(feat_imp, x='Importance', y='Feature', orientation='h', title='Feature Importance')
     fig.write_html("feature_importance.html")
 
+def check_predictions(model, X_test, y_test):
+    """Spread and calibration of test-set probabilities. Returns a list of problems."""
+    y = np.asarray(y_test, dtype=np.float64)
+    p = model.predict_proba(X_test)[:, 1]
+    lo, hi = np.percentile(p, [5, 95])
+    bins = np.minimum((p * 10).astype(int), 9)
+    ece = sum(abs(p[bins == b].mean() - y[bins == b].mean()) * (bins == b).mean()
+              for b in np.unique(bins))
+    tiers = np.bincount(np.searchsorted(TIER_EDGES, p, side="right"), minlength=len(TIER_NAMES))
+    print(f"Probability spread (p5–p95): {lo:.2f}–{hi:.2f} · Brier {brier_score_loss(y, p):.4f} · "
+          f"ECE {ece:.4f}")
+    print("Risk tiers:", ", ".join(f"{n} {c}" for n, c in zip(TIER_NAMES, tiers)))
+    problems = []
+    if hi - lo < MIN_PROB_SPREAD:
+        problems.append(f"probabilities only span {lo:.2f}–{hi:.2f}")
+    if ece > MAX_CALIBRATION_ERROR:
+        problems.append(f"calibration error {ece:.3f} > {MAX_CALIBRATION_ERROR}")
+    return problems
+
 # ---- 4. Save Artifacts ----
 def save_artifacts(model, scaler, df):
     joblib.dump(model, "model.pkl")
     joblib.dump(scaler, "scaler.pkl")
+    write_feature_importance(IMPORTANCE_NAME, model)
+    params = {k: v for k, v in model.get_params().items() if k in TRAIN_PARAM_KEYS and v is not None}
+    header = write_bundle(BUNDLE_NAME, model, scaler,
+                          meta={"watermark": {"source": "diabetes.csv", "rows": len(df)},
+                                "train_params": params})
+    print(f"Model bundle {BUNDLE_NAME} version {header['sha256'][:12]}")
     df.to_csv("enhanced_diabetes.csv", index=False)
     print("Artifacts saved!")
 
 # ---- Main ----
 if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Train the diabetes risk model.")
+    ap.add_argument("--search", choices=["grid", "random", "halving"], default=None,
+                    help="use the parallel tuning engine instead of GridSearchCV")
+    ap.add_argument("--n-jobs", type=int, default=None)
+    ap.add_argument("--force", action="store_true",
+                    help="with --search: save even if the spread / calibration check fails "
+                         "(the default GridSearchCV run only warns)")
+    args = ap.parse_args()
+
     X_train, X_test, y_train, y_test, scaler, df = load_data()
-    model = train_xgboost(X_train, y_train)
+    model = train_xgboost(X_train, y_train, args.search, args.n_jobs)
     evaluate_model(model, X_test, y_test)
+    problems = check_predictions(model, X_test, y_test)
+    # only the tuning engine's winners are gated; the baseline pipeline saves as before
+    if problems and args.search and not args.force:
+        raise SystemExit("Model not saved: " + "; ".join(problems) + " (use --force to save anyway)")
+    for p in problems:
+        print(f"Warning: {p}")
     save_artifacts(model, scaler, df)
\ No newline at end of file
@@ -7,24 +7,11 @@ Fixes: unified scroll (no sidebar), OpenAI chat, statsmodels crash removed,
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import plotly.express as px
 import plotly.graph_objects as go
 import datetime
 import time
 import sys
 import os
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from streamlit_calendar import calendar
-
-# Optional OpenAI
-try:
-    from openai import OpenAI as _OpenAI
-    _OPENAI_AVAILABLE = True
-except ImportError:
-    _OPENAI_AVAILABLE = False
 
 # ── Path / auth setup ──────────────────────────────────────────────────────────
 current_dir = os.path.dirname(__file__)
@@ -39,6 +26,20 @@ except ImportError:
     def verify_user(u, p):   return False
     def generate_token(u):   return "tok"
 
+from chat_assistant import ChatAssistant
+from chat_cache import ChatCache, context_bucket
+from chat_history import PAGE_SIZE, ChatHistory
+from history_store import HistoryStore
+from med_schedule import FREQ_DOSES, PALETTE, expand, med_list_version, rules_for, times_for, week_start
+from model_io import (IMPORTANCE_NAME, feature_importance_table, model_ready, predict_proba,
+                      read_feature_importance)
+from prediction_cache import PREDICTIONS
+from reports import report_pdf
+from risk_tiers import RISK_COLORS, TIER_EDGES, TIER_NAMES, risk_profile
+from scoring_service import RemoteScorer
+from timeline import MAX_POINTS, lttb
+from what_if import BMI_AXIS, GLUCOSE_AXIS, age_axis, risk_grid
+
 # clean leftover artefacts
 for _f in ["confusion_matrix.html"]:
     _p = os.path.join(current_dir, _f)
@@ -311,9 +312,13 @@ def _ss(k, v):
 
 _ss("username",       None)
 _ss("token",          None)
-_ss("chat_history",   [])
+_ss("chat_history",   ChatHistory())
+_ss("chat_visible",   PAGE_SIZE)
 _ss("medications",    [])
 _ss("health_history", [])
+_ss("last_assessment", None)   # inputs of the latest prediction, for the lazy PDF
+_ss("assessment",      None)   # (prob, profile, version, grid scorer, row): results survive reruns
+_ss("model_version",  None)
 _ss("auth_mode",      "Login")
 
 
@@ -322,108 +327,82 @@ _ss("auth_mode",      "Login")
 # =============================================================================
 @st.cache_resource
 def load_model():
-    mp = os.path.join(current_dir, "model.pkl")
-    sp = os.path.join(current_dir, "scaler.pkl")
-    m = s = None
-    try:
-        if os.path.exists(mp): m = joblib.load(mp)
-        if os.path.exists(sp): s = joblib.load(sp)
-    except Exception as e:
-        st.error(f"Model load error: {e}")
-    return m, s
+    # Shared across sessions; a background thread hot-swaps new artifact versions
+    from model_registry import ModelRegistry
+    return ModelRegistry(current_dir).start()
 
-ML_MODEL, ML_SCALER = load_model()
 
+def _active_model():
+    """(model, scaler, version). XGBoost and the artifacts load on the first assessment."""
+    active = load_model().active
+    st.session_state.model_version = active[2]
+    return active
 
-# =============================================================================
-# OPENAI CHAT
-# =============================================================================
-class ChatAssistant:
-    SYSTEM = (
-        "You are a knowledgeable diabetes specialist AI. "
-        "Give accurate, evidence-based answers about diabetes prevention, management, "
-        "diet, exercise, and medication. Keep replies concise (≤150 words). "
-        "Always remind users to consult a qualified healthcare professional."
-    )
-
-    def __init__(self):
-        self.client = None
-        self.error  = None
-        if not _OPENAI_AVAILABLE:
-            self.error = "openai package not installed (add to requirements.txt)."
-            return
-        key = None
-        try:   key = st.secrets.get("OPENAI_API_KEY")
-        except: pass
-        if not key: key = os.getenv("OPENAI_API_KEY")
-        if not key:
-            self.error = "OPENAI_API_KEY not found in secrets or environment."
-            return
-        try:
-            self.client = _OpenAI(api_key=key)
-        except Exception as e:
-            self.error = str(e)
-
-    def ask(self, question: str, context: str = "") -> str:
-        if not self.client:
-            return f"⚠️ Chat unavailable: {self.error}"
-        messages = [{"role": "system", "content": self.SYSTEM}]
-        if context:
-            messages.append({"role": "system", "content": f"User health context: {context}"})
-        messages.append({"role": "user", "content": question})
+# Optional: score through the micro-batching service (scoring_service.py)
+SCORING_URL = os.getenv("GLUCOCHECK_SCORING_URL")
+
+
+@st.cache_resource
+def get_remote_scorer():
+    # One client per process, so a failure opens the circuit for every session
+    return RemoteScorer(SCORING_URL) if SCORING_URL else None
+
+
+def _score(row):
+    """(probability, risk profile, model version, batch scorer) for one feature row.
+
+    Remote when configured and the circuit is closed; the local model is only
+    loaded as the fallback. None when neither can score.
+    """
+    remote = get_remote_scorer()
+    if remote is not None and remote.available:
         try:
-            resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
-                max_tokens=300,
-                temperature=0.65,
-            )
-            return resp.choices[0].message.content.strip()
-        except Exception as e:
-            return f"Error: {e}"
+            res = remote.score(row)
+            return (res["probability"],
+                    {k: res[k] for k in ("risk","color","icon","diet","exercise",
+                                         "supplements","bmi_cat","age_grp")},
+                    res["model_version"], remote.probabilities)
+        except Exception:
+            pass   # service unreachable — circuit opens, fall back to the in-process model
+    model, scaler, version = _active_model()
+    if not model_ready(model, scaler):
+        return None
+    # resubmitted slider values are served from the shared LRU
+    prob, rec = PREDICTIONS.score(model, scaler, version, row)
+    return prob, rec, version, lambda X: predict_proba(model, scaler, X)
+
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
 
 
+def _load_user_data(username):
+    """Restore the user's persisted medications and recent assessments."""
+    store = get_history_store()
+    st.session_state.medications    = store.medications(username)
+    st.session_state.health_history = store.assessments(username, limit=50)
+
+
+# =============================================================================
+# OPENAI CHAT
+# =============================================================================
 @st.cache_resource
 def get_chat_assistant():
-    return ChatAssistant()
+    # one shared client / connection pool; OPENAI_BASE_URL selects another endpoint
+    key = None
+    try:   key = st.secrets.get("OPENAI_API_KEY")
+    except: pass
+    return ChatAssistant(api_key=key, cache=ChatCache())
 
 
 # =============================================================================
 # HELPERS
 # =============================================================================
-_RISK_COLORS = {"Very Low":"#3fb950","Low":"#8BC34A","Moderate":"#d29922",
-                "High":"#FF9800","Very High":"#f85149"}
+_RISK_COLORS = RISK_COLORS
 
 def _risk(prob, bmi, age):
-    ag  = "Child/Teen" if age < 18 else ("Senior" if age > 60 else "Adult")
-    bmc = ("Underweight" if bmi<18.5 else "Normal" if bmi<25
-           else "Overweight" if bmi<30 else "Obese")
-    tiers = [
-        (.2, "Very Low","#3fb950","😊",
-         ["Balanced whole-food diet.","Limit processed sugars.","Stay hydrated."],
-         ["30-min brisk walk 5×/week.","Strength training 2-3×/week."],
-         ["Multivitamin.","Omega-3 fatty acids."]),
-        (.4,"Low","#8BC34A","🙂",
-         ["Focus on portion control.","Increase fibre intake.","Cut sugary drinks."],
-         ["150 min moderate exercise/week.","Cycling or swimming."],
-         ["Vitamin D."]),
-        (.6,"Moderate","#d29922","😐",
-         ["Limit refined carbs.","Lean protein + healthy fats.","See a nutritionist."],
-         ["200–250 min moderate/week.","Cardio + strength training."],
-         ["Chromium picolinate.","Magnesium."]),
-        (.8,"High","#FF9800","😟",
-         ["Low-GI diet.","Eliminate sugary snacks.","Work with a dietitian."],
-         ["250–300 min moderate/week.","Monitor blood sugar pre/post exercise."],
-         ["Berberine (doctor approval).","Alpha-lipoic acid."]),
-        (2.,"Very High","#f85149","❗",
-         ["Medical nutrition therapy.","Zero processed food.","Regular BGL monitoring."],
-         ["Daily activity even short walks.","Supervised exercise programme."],
-         ["Supplements only under supervision.","CoQ10."]),
-    ]
-    for t,rl,col,ic,di,ex,su in tiers:
-        if prob < t:
-            return dict(risk=rl,color=col,icon=ic,diet=di,exercise=ex,
-                        supplements=su,bmi_cat=bmc,age_grp=ag)
+    return risk_profile(prob, bmi, age)
 
 
 def _gauge(prob, color):
@@ -449,6 +428,46 @@ def _gauge(prob, color):
     return fig
 
 
+# Discrete tier colours on the 0–1 probability scale
+_TIER_SCALE = [[lo, RISK_COLORS[n]] for lo, hi, n in
+               zip([0., *TIER_EDGES], [*TIER_EDGES, 1.], TIER_NAMES) for lo in (lo, hi)]
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _what_if_fig(row, version, _score_rows):
+    """Glucose × BMI risk contour for one submitted input, one contour per age.
+
+    The grid is scored in a single batch (`_score_rows`, local or remote) and
+    cached per (input, model version); the age slider and hover run
+    client-side, with no rerun per tick.
+    """
+    ages = age_axis(row[7])
+    grid = risk_grid(_score_rows, row, ages=ages)
+    fig = go.Figure()
+    for i, a in enumerate(ages):
+        fig.add_trace(go.Contour(
+            x=GLUCOSE_AXIS, y=BMI_AXIS, z=grid[i], zmin=0, zmax=1, visible=bool(a == row[7]),
+            colorscale=_TIER_SCALE, contours=dict(start=0, end=1, size=.2),
+            colorbar=dict(title="Risk", tickformat=".0%", len=.8),
+            line=dict(width=.5, color="#0d1117"),
+            hovertemplate=f"Age {a:.0f}<br>Glucose %{{x:.0f}} · BMI %{{y:.0f}}"
+                          "<br>Risk %{z:.1%}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=[row[1]], y=[row[5]], mode="markers", name="You",
+                             marker=dict(color="#6C63FF", size=14, symbol="star",
+                                         line=dict(color="white", width=1))))
+    n = len(ages)
+    fig.update_layout(
+        title=dict(text="What if? Glucose × BMI", font=dict(size=15)),
+        height=340, margin=dict(l=10, r=10, t=40, b=10), showlegend=False,
+        xaxis_title="Glucose (mg/dL)", yaxis_title="BMI",
+        sliders=[dict(active=int(np.flatnonzero(ages == row[7])[0]),
+                      currentvalue=dict(prefix="Age "), pad=dict(t=40),
+                      steps=[dict(label=f"{a:.0f}", method="restyle",
+                                  args=[{"visible": [j == i for j in range(n)] + [True]}])
+                             for i, a in enumerate(ages)])])
+    return _dark_fig(fig).to_dict()
+
+
 def _dark_fig(fig):
     fig.update_layout(paper_bgcolor="#161b22",plot_bgcolor="#161b22",
                       font_color="white",
@@ -457,38 +476,88 @@ def _dark_fig(fig):
     return fig
 
 
-def _pdf(prob, rec, age, bmi, glucose, bp, skin, insulin, ped, preg):
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=letter)
-    w, h = letter
-    c.setFont("Helvetica-Bold",20); c.setFillColorRGB(.42,.39,1.)
-    c.drawString(50,h-50,"GlucoCheck Pro+ — Health Report")
-    c.setFont("Helvetica",10); c.setFillColorRGB(.55,.55,.55)
-    c.drawString(50,h-66,f"Generated: {datetime.date.today()}")
-    y = h-105; c.setFont("Helvetica-Bold",12); c.setFillColorRGB(0,0,0)
-    c.drawString(50,y,"Patient Metrics")
-    c.setFont("Helvetica",10)
-    for ln in [f"Age: {age} yrs | BMI: {bmi:.1f} ({rec['bmi_cat']}) | Glucose: {glucose} mg/dL",
-               f"Blood Pressure: {bp} mmHg | Skin Thickness: {skin} mm | Insulin: {insulin} μU/mL",
-               f"Diabetes Pedigree: {ped:.3f} | Pregnancies: {preg}"]:
-        y -= 15; c.drawString(60,y,ln)
-    y -= 25; c.setFont("Helvetica-Bold",12); c.drawString(50,y,"Risk Assessment")
-    c.setFont("Helvetica",10); y-=15
-    c.drawString(60,y,f"Probability: {prob*100:.1f}%   Risk Level: {rec['risk']}")
-    for section, items in [("Diet",rec["diet"]),("Exercise",rec["exercise"]),("Supplements",rec["supplements"])]:
-        y -= 22; c.setFont("Helvetica-Bold",11); c.drawString(50,y,f"{section}:")
-        c.setFont("Helvetica",10)
-        for item in items: y-=13; c.drawString(62,y,f"• {item}")
-    c.setFont("Helvetica-Oblique",8); c.setFillColorRGB(.5,.5,.5)
-    c.drawString(50,42,"Disclaimer: This is a risk assessment tool only. Always consult a qualified healthcare professional.")
-    c.showPage(); c.save(); buf.seek(0)
-    return buf.getvalue()
-
-
-def _time_for_period(period, end=False):
-    t = {"Morning":("08:00:00","09:00:00"),"Afternoon":("12:00:00","13:00:00"),
-         "Evening":("18:00:00","19:00:00"),"Night":("21:00:00","22:00:00")}
-    return t[period][1 if end else 0]
+_FACTOR_LABELS = ["Pregnancies","Glucose","BP","SkinThickness","Insulin","BMI","Pedigree","Age"]
+
+def _importance_fig(table):
+    """Importance bar chart; the gain / cover / weight toggle is client-side (Plotly buttons)."""
+    kinds = [k for k in ("gain","cover","weight") if k in table]
+    def series(kind):
+        order = np.argsort(table[kind])
+        return ([table[kind][i] for i in order], [_FACTOR_LABELS[i] for i in order])
+    x, y = series(kinds[0])
+    fig = go.Figure(go.Bar(x=x, y=y, orientation="h",
+                           marker=dict(color=x, colorscale="Purples", showscale=True)))
+    if len(kinds) > 1:
+        buttons = []
+        for k in kinds:
+            kx, ky = series(k)
+            buttons.append(dict(label=k.title(), method="restyle",
+                                args=[{"x":[kx], "y":[ky], "marker.color":[kx]}]))
+        fig.update_layout(updatemenus=[dict(type="buttons", direction="right", buttons=buttons,
+                                            x=1, xanchor="right", y=1.15, yanchor="top",
+                                            bgcolor="#21262d", font=dict(color="white"))])
+    fig.update_layout(title="Feature Importances", xaxis_title="Importance", yaxis_title="Factor")
+    return _dark_fig(fig)
+
+
+@st.cache_data(show_spinner=False)
+def _importance_fig_file(path, mtime):
+    return _importance_fig(read_feature_importance(path)["importance"]).to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def _importance_fig_model(key, _model):
+    if hasattr(_model, "get_booster") or hasattr(_model, "booster"):
+        return _importance_fig(feature_importance_table(_model)).to_dict()
+    if hasattr(_model, "feature_importances_"):
+        return _importance_fig({"gain": list(_model.feature_importances_)}).to_dict()
+    return None
+
+
+def _importance_figure():
+    """Importance chart built once per feature_importance.json / model version.
+    The cached figure is a dict; every caller gets its own Figure."""
+    path = os.path.join(current_dir, IMPORTANCE_NAME)
+    if os.path.exists(path):
+        return go.Figure(_importance_fig_file(path, os.path.getmtime(path)))
+    model = _active_model()[0]
+    if model is None:
+        return None
+    fig = _importance_fig_model(getattr(model, "version", id(model)), model)
+    return go.Figure(fig) if fig is not None else None
+
+
+@st.cache_data(show_spinner=False)
+def _glucose_bmi_base(csv, mtime):
+    """Dataset scatter + per-outcome trend lines, built once per file version.
+    Returns the figure as a dict; callers overlay the user's own point."""
+    import plotly.express as px
+    df2 = pd.read_csv(csv, usecols=["Glucose","BMI","Age","Outcome"])
+    # ── FIX: removed trendline="lowess" — statsmodels not installed ──
+    fig = px.scatter(df2, x="Glucose", y="BMI", color="Outcome",
+                     hover_data=["Age"],
+                     title="Glucose vs BMI (0=No Diabetes, 1=Diabetes)",
+                     color_discrete_map={0:"#3fb950",1:"#f85149"})
+    # Manual trend lines using numpy polyfit
+    for outcome, col in [(0,"#3fb950"),(1,"#f85149")]:
+        sub = df2[df2["Outcome"]==outcome]
+        if len(sub) > 2:
+            z = np.polyfit(sub["Glucose"], sub["BMI"], 1)
+            x_line = np.linspace(sub["Glucose"].min(), sub["Glucose"].max(), 100)
+            y_line = np.poly1d(z)(x_line)
+            fig.add_trace(go.Scatter(x=x_line, y=y_line, mode="lines",
+                                     line=dict(color=col, width=2, dash="dot"),
+                                     name=f"Trend ({'No DM' if outcome==0 else 'DM'})"))
+    return _dark_fig(fig).to_dict()
+
+
+def _report_download():
+    """PDF for the last assessment, only rendered once the user asks for it."""
+    last = st.session_state.last_assessment
+    if st.button("📄 Prepare PDF Report", key="prep_pdf"):
+        st.download_button("📥 Download PDF Report", data=report_pdf(*last),
+                           file_name=f"glucocheck_{datetime.date.today()}.pdf",
+                           mime="application/pdf")
 
 
 # =============================================================================
@@ -530,6 +599,7 @@ def _panel_auth():
             if verify_user(u, p):
                 st.session_state.username = u
                 st.session_state.token    = generate_token(u)
+                _load_user_data(u)
                 st.rerun()
             else:
                 st.error("Invalid username or password.")
@@ -559,12 +629,17 @@ def _panel_app(username):
     <div class="user-card">
         <span class="u-icon">👤</span>
         <span class="u-name">{username}</span>
-        <span class="u-sub">Active session</span>
+        <span class="u-sub">Active session · model {st.session_state.model_version or "loads on first assessment"}
+            · cache hits {PREDICTIONS.stats()["hit_rate"]:.0%}</span>
     </div>""", unsafe_allow_html=True)
 
     if st.button("🚪 Logout", use_container_width=True, key="do_logout"):
         st.session_state.username = None
         st.session_state.token    = None
+        st.session_state.medications    = []
+        st.session_state.health_history = []
+        st.session_state.last_assessment = None
+        st.session_state.assessment      = None
         st.rerun()
 
     st.markdown("<hr style='margin:12px 0'>", unsafe_allow_html=True)
@@ -595,68 +670,141 @@ def tab_chat():
     if assistant.error:
         st.warning(f"⚠️ {assistant.error}")
 
-    # Chat history
-    html = "<div class='chat-box'>"
-    if not st.session_state.chat_history:
-        html += "<p style='text-align:center;color:rgba(255,255,255,.25);padding:28px 0'>No messages yet — ask below!</p>"
-    for m in st.session_state.chat_history:
-        ts = datetime.datetime.strptime(m["ts"],"%Y%m%d%H%M%S%f").strftime("%H:%M")
-        if m["role"] == "user":
-            html += f"<div class='msg-user'>{m['text']}<div class='msg-t' style='text-align:right'>{ts}</div></div>"
-        else:
-            html += f"<div class='msg-ai'><strong>AI Doctor:</strong> {m['text']}<div class='msg-t'>{ts}</div></div>"
-    html += "</div>"
-    st.markdown(html, unsafe_allow_html=True)
+    chat = st.session_state.chat_history
+    if len(chat) > st.session_state.chat_visible:
+        if st.button("⬆️ Load earlier messages", key="chat_more"):
+            st.session_state.chat_visible += PAGE_SIZE
+    box = st.empty()
+    box.markdown(chat.render(st.session_state.chat_visible), unsafe_allow_html=True)
 
-    ci, cb = st.columns([5,1])
+    ci, cb, cs = st.columns([5,1,1])
     with ci:
         q = st.text_input("q", placeholder="Ask a diabetes question…",
                           label_visibility="collapsed", key="chat_q")
     with cb:
         send = st.button("Send 💬", use_container_width=True)
+    with cs:
+        streaming = st.toggle("Stream", value=True, key="chat_stream")
 
     if send and q and q.strip():
-        ts = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
-        st.session_state.chat_history.append({"role":"user","text":q.strip(),"ts":ts})
-        ctx = ""
+        turns = chat.context_turns()     # earlier turns within the prompt token budget
+        chat.append("user", q.strip())
+        ctx, bucket = "", ""
         if st.session_state.health_history:
             last = st.session_state.health_history[-1]
             ctx = f"{last['risk']} risk, BMI {last['bmi']:.1f}, Glucose {last['glucose']}, Age {last['age']}"
-        with st.spinner("Thinking…"):
-            reply = assistant.ask(q.strip(), ctx)
-        st.session_state.chat_history.append({
-            "role":"ai","text":reply,
-            "ts":datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
-        })
-        st.rerun()
-
-    if st.session_state.chat_history:
+            bucket = context_bucket(last)
+        if streaming:
+            # tokens are produced on a background thread and painted as they arrive
+            stream, shown = assistant.stream(q.strip(), ctx, bucket, turns), 0.
+            for _ in stream:
+                if time.perf_counter() - shown > .05:
+                    box.markdown(chat.render(st.session_state.chat_visible, stream.text + " ▌"),
+                                 unsafe_allow_html=True)
+                    shown = time.perf_counter()
+            reply = stream.result()
+        else:
+            with st.spinner("Thinking…"):
+                reply = assistant.ask(q.strip(), ctx, bucket, turns)
+        chat.append("ai", reply)
+        # repaint in place instead of rerunning the whole page
+        box.markdown(chat.render(st.session_state.chat_visible), unsafe_allow_html=True)
+
+    if assistant.cache is not None:
+        cs = assistant.cache.stats()
+        if cs["hits"] + cs["misses"]:
+            st.caption(f"⚡ {cs['hit_rate']:.0%} of questions answered from cache · "
+                       f"{cs['saved_seconds']:.1f}s of waiting saved")
+
+    if chat:
         if st.button("🗑️ Clear Chat", key="clr_chat"):
-            st.session_state.chat_history = []; st.rerun()
+            chat.clear(); st.session_state.chat_visible = PAGE_SIZE; st.rerun()
+
+
+_TIMELINE_WINDOWS = {"Last 30 days":30, "Last 90 days":90, "Last year":365, "All time":None}
+
+_TIMELINE_GRAINS = ["Auto", "Each assessment", "Daily", "Weekly"]
+_TIMELINE_PAGE = 10
+
+
+def _timeline_rollup_fig(rows, period):
+    """Mean / max probability per day or week, LTTB-downsampled to MAX_POINTS."""
+    keep = lttb(np.arange(len(rows)), [r["mean"] for r in rows])
+    rows = [rows[i] for i in keep]
+    x = [r["bucket"] for r in rows]
+    fig = go.Figure([
+        go.Scatter(x=x, y=[r["max"] for r in rows], name=f"{period} max", mode="lines",
+                   line=dict(color="#f85149", width=1, dash="dot")),
+        go.Scatter(x=x, y=[r["mean"] for r in rows], name=f"{period} mean", mode="lines+markers",
+                   line=dict(color="#6C63FF", width=2), customdata=[r["n"] for r in rows],
+                   hovertemplate="%{x}<br>mean %{y:.1%} · %{customdata} assessments<extra></extra>"),
+    ])
+    fig.update_layout(title=f"Diabetes Risk Over Time ({period.lower()})")
+    return fig
+
+
+def _timeline_series_fig(ts, prob):
+    """Every assessment, LTTB-downsampled to MAX_POINTS, coloured by tier."""
+    x = pd.to_datetime(pd.Series(ts)).to_numpy()
+    keep = lttb(x.astype("datetime64[s]").astype(np.int64), prob)
+    p = np.asarray(prob, dtype=np.float64)[keep]
+    colors = [RISK_COLORS[TIER_NAMES[t]] for t in np.searchsorted(TIER_EDGES, p, side="right")]
+    fig = go.Figure(go.Scatter(x=x[keep], y=p, mode="lines+markers", name="Risk",
+                               line=dict(color="rgba(108,99,255,.4)", width=1),
+                               marker=dict(color=colors, size=7),
+                               hovertemplate="%{x}<br>%{y:.1%}<extra></extra>"))
+    fig.update_layout(title=f"Diabetes Risk Over Time ({len(keep)} of {len(ts)} points)")
+    return fig
 
 
 def tab_timeline():
     st.markdown("### 📈 Health Timeline")
-    if not st.session_state.health_history:
+    c1, c2 = st.columns([2,1])
+    with c1:
+        win = st.selectbox("Window", list(_TIMELINE_WINDOWS), index=1,
+                           label_visibility="collapsed", key="tl_win")
+    with c2:
+        grain = st.selectbox("Resolution", _TIMELINE_GRAINS,
+                             label_visibility="collapsed", key="tl_grain")
+    days  = _TIMELINE_WINDOWS[win]
+    since = (datetime.datetime.now()-datetime.timedelta(days=days)).isoformat(sep=" ") if days else None
+    store, user = get_history_store(), st.session_state.username
+    total = store.count_assessments(user, since=since)
+    if not total:
         st.info("Complete an assessment to see your timeline here.")
         return
 
-    df = pd.DataFrame(st.session_state.health_history)
-    df["date"] = pd.to_datetime(df["date"])
-
-    fig = px.scatter(
-        df, x="date", y="probability", color="risk",
-        size="probability", hover_data=["bmi","glucose","age"],
-        title="Diabetes Risk Over Time",
-        color_discrete_map=_RISK_COLORS
-    )
+    rows = None
+    if grain == "Auto":
+        grain = "Each assessment" if total <= MAX_POINTS else "Daily"
+    if grain != "Each assessment":
+        rows = store.rollups(user, "day" if grain == "Daily" else "week", since=since)
+
+    if rows is not None:
+        fig = _timeline_rollup_fig(rows, grain)
+    elif total <= MAX_POINTS:
+        import plotly.express as px
+        df = pd.DataFrame(store.assessments(user, since=since))
+        df["date"] = pd.to_datetime(df["date"])
+        fig = px.scatter(
+            df, x="date", y="probability", color="risk",
+            size="probability", hover_data=["bmi","glucose","age"],
+            title="Diabetes Risk Over Time",
+            color_discrete_map=_RISK_COLORS
+        )
+    else:
+        fig = _timeline_series_fig(*store.assessment_series(user, since=since))
     _dark_fig(fig)
     fig.update_layout(height=400, hovermode="x unified",
                       yaxis_title="Probability", xaxis_title="Date")
     st.plotly_chart(fig, use_container_width=True)
 
-    with st.expander("📋 Detailed Records"):
-        for e in reversed(st.session_state.health_history):
+    with st.expander(f"📋 Detailed Records ({total})"):
+        pages = -(-total // _TIMELINE_PAGE)
+        page  = st.selectbox("Page", range(1, pages+1), key="tl_page",
+                             format_func=lambda p: f"Page {p} of {pages}") if pages > 1 else 1
+        for e in reversed(store.assessments(user, since=since, limit=_TIMELINE_PAGE,
+                                            offset=(page-1)*_TIMELINE_PAGE)):
             rc = _RISK_COLORS.get(e["risk"],"#6C63FF")
             st.markdown(f"""
             <div class="hist-card">
@@ -673,6 +821,15 @@ def tab_timeline():
             </div>""", unsafe_allow_html=True)
 
 
+_MED_WINDOWS = {"This week":1, "Next 4 weeks":4, "Next 3 months":13}
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _med_events(version, first, last, _meds):
+    """Calendar events for one med-list version, expanded only for [first, last)."""
+    return expand(rules_for(_meds), first, last)
+
+
 def tab_meds():
     st.markdown("### 💊 Medication Planner")
 
@@ -683,23 +840,29 @@ def tab_meds():
         with c2: dose   = st.text_input("Dosage", placeholder="e.g. 500 mg")
         c1,c2 = st.columns(2)
         with c1: freq  = st.selectbox("Frequency",["Once daily","Twice daily","Three times daily","Weekly"])
-        with c2: times = st.multiselect("Time of Day",["Morning","Afternoon","Evening","Night"])
+        with c2: times = st.multiselect("Time of Day",["Morning","Afternoon","Evening","Night"],
+                                        help="Leave empty for the frequency's usual times")
         sd    = st.date_input("Start Date", datetime.date.today())
         notes = st.text_area("Notes (optional)", height=70)
         if st.form_submit_button("➕ Add"):
-            if name and dose and times:
-                st.session_state.medications.append(
-                    {"name":name,"dose":dose,"freq":freq,"times":times,
-                     "start":sd.strftime("%Y-%m-%d"),"notes":notes})
-                st.success(f"✅ {name} added."); st.rerun()
+            doses = FREQ_DOSES[freq]
+            if not (name and dose):
+                st.error("Name and Dosage are required.")
+            elif times and len(times) != doses:
+                st.error(f"{freq} needs {doses} time{'s' if doses > 1 else ''} of day "
+                         f"(or leave it empty for the usual times).")
             else:
-                st.error("Name, Dosage and at least one Time are required.")
+                st.session_state.medications.append(get_history_store().add_medication(
+                    st.session_state.username,
+                    {"name":name,"dose":dose,"freq":freq,"times":times_for(freq, times),
+                     "start":sd.strftime("%Y-%m-%d"),"notes":notes}))
+                st.success(f"✅ {name} added."); st.rerun()
 
     st.markdown("#### Your Medications")
     if not st.session_state.medications:
         st.info("No medications yet.")
     else:
-        pal = ["#6C63FF","#FF6B6B","#3fb950","#d29922","#4D44DB"]
+        pal = PALETTE
         for i,m in enumerate(st.session_state.medications):
             ci,cd = st.columns([6,1])
             with ci:
@@ -713,28 +876,27 @@ def tab_meds():
                 </div>""", unsafe_allow_html=True)
             with cd:
                 st.markdown("<div style='height:26px'></div>", unsafe_allow_html=True)
-                if st.button("❌", key=f"del_{i}_{m['name']}"):
+                if st.button("❌", key=f"del_{m.get('id',i)}"):
+                    if m.get("id"):
+                        get_history_store().remove_medication(st.session_state.username, m["id"])
                     st.session_state.medications.pop(i); st.rerun()
 
     st.markdown("#### 📅 Weekly Schedule")
     if not st.session_state.medications:
         st.info("Add medications above to see the calendar.")
         return
-    events = []
-    pal = ["#6C63FF","#FF6B6B","#3fb950","#d29922","#4D44DB"]
-    for i,m in enumerate(st.session_state.medications):
-        for period in m["times"]:
-            s = _time_for_period(period)
-            e = _time_for_period(period, end=True)
-            for offset in range(7):
-                d = (datetime.date.today()+datetime.timedelta(days=offset)).isoformat()
-                events.append({"title":f"{m['name']} ({m['dose']})","color":pal[i%len(pal)],
-                               "start":f"{d}T{s}","end":f"{d}T{e}"})
-    calendar(events=events, options={
+    win   = st.selectbox("Show", list(_MED_WINDOWS), key="med_win")
+    first = week_start(datetime.date.today())
+    last  = first + datetime.timedelta(weeks=_MED_WINDOWS[win])
+    meds  = st.session_state.medications
+    from streamlit_calendar import calendar
+    calendar(events=_med_events(med_list_version(meds), first, last, meds), options={
         "headerToolbar":{"left":"today prev,next","center":"title","right":"timeGridWeek,dayGridMonth"},
-        "initialView":"timeGridWeek","slotMinTime":"06:00:00","slotMaxTime":"23:00:00",
+        "initialView":"timeGridWeek" if _MED_WINDOWS[win] == 1 else "dayGridMonth",
+        "validRange":{"start":first.isoformat(),"end":last.isoformat()},
+        "slotMinTime":"06:00:00","slotMaxTime":"23:00:00",
         "height":"auto","aspectRatio":2,
-    }, key="med_cal")
+    }, callbacks=[], key=f"med_cal_{_MED_WINDOWS[win]}")
 
 
 # =============================================================================
@@ -756,23 +918,29 @@ def page_app(submitted_data):
     </div>""", unsafe_allow_html=True)
 
     if submitted:
-        if ML_MODEL is None or ML_SCALER is None:
-            st.error("Model not loaded — cannot assess risk."); return
-
-        arr  = np.array([[preg, gluc, bp, skin, ins, bmi, ped, age]])
-        prob = ML_MODEL.predict_proba(ML_SCALER.transform(arr))[0][1]
-        rec  = _risk(prob, bmi, age)
+        scored = _score([preg, gluc, bp, skin, ins, bmi, ped, age])
+        if scored is None:
+            err = load_model().last_error
+            st.error(f"Model not loaded — cannot assess risk.{f' ({err})' if err else ''}"); return
+        prob, rec, version, score_rows = scored
+        st.session_state.model_version = version
 
         entry = {"date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
                  "probability": float(prob), "risk": rec["risk"],
                  "bmi": float(bmi), "glucose": float(gluc), "age": int(age)}
         st.session_state.health_history.append(entry)
+        get_history_store().record_assessment(username, entry)
 
-        # Download button
-        pdf = _pdf(prob, rec, age, bmi, gluc, bp, skin, ins, ped, preg)
-        st.download_button("📥 Download PDF Report", data=pdf,
-                           file_name=f"glucocheck_{datetime.date.today()}.pdf",
-                           mime="application/pdf")
+        st.session_state.last_assessment = (float(prob), age, bmi, gluc, bp, skin, ins, ped, preg)
+        row = (float(preg), float(gluc), float(bp), float(skin),
+               float(ins), float(bmi), float(ped), float(age))
+        st.session_state.assessment = (prob, rec, version, score_rows, row)
+
+    if st.session_state.assessment:
+        # Redrawn from session state, so reruns (PDF, chat, meds) keep the results
+        prob, rec, version, score_rows, row = st.session_state.assessment
+        gluc, bmi = row[1], row[5]
+        _report_download()
 
         # Risk summary cards
         c1,c2,c3 = st.columns(3)
@@ -793,7 +961,7 @@ def page_app(submitted_data):
                 unsafe_allow_html=True)
 
         st.markdown("---")
-        ga,gb = st.columns([1,2])
+        ga,gw,gb = st.columns([1,1.2,1.4])
         with ga:
             st.plotly_chart(_gauge(prob,rec["color"]), use_container_width=True)
             with st.expander("📊 Your Risk Summary", expanded=True):
@@ -805,6 +973,15 @@ def page_app(submitted_data):
                 elif prob>.4: st.info("Lifestyle changes can significantly reduce risk.")
                 else:         st.success("Keep up your healthy habits!")
 
+        with gw:
+            try:
+                st.plotly_chart(go.Figure(_what_if_fig(row, version, score_rows)),
+                                use_container_width=True)
+                st.caption("Hover to see how your risk changes as glucose or BMI drops; "
+                           "drag the slider to compare ages.")
+            except Exception:
+                st.info("What-if chart unavailable — the scoring service stopped responding.")
+
         with gb:
             t1,t2,t3 = st.tabs(["🍽️ Diet","🏋️ Exercise","💊 Supplements"])
             with t1:
@@ -820,9 +997,9 @@ def page_app(submitted_data):
                                 "- **Dinner**: Baked fish + sweet potato + greens")
             with t2:
                 for item in rec["exercise"]: st.markdown(f"- {item}")
-                dcols = st.columns(7)
-                for i,d in enumerate(["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]):
-                    with dcols[i]: st.caption(d); st.write("🏋️" if i%2==0 else "🏃")
+                # one row of text: columns can't nest a second level inside gb
+                st.markdown(" · ".join(f"{d} {'🏋️' if i%2==0 else '🏃'}" for i,d in
+                                       enumerate(["Mon","Tue","Wed","Thu","Fri","Sat","Sun"])))
             with t3:
                 for item in rec["supplements"]: st.markdown(f"- {item}")
                 st.info("Always consult your doctor before starting any supplement.")
@@ -832,38 +1009,19 @@ def page_app(submitted_data):
         st.markdown("### 📊 Health Insights")
         i1,i2 = st.tabs(["Risk Factors","Glucose vs BMI"])
         with i1:
-            if ML_MODEL and hasattr(ML_MODEL,"feature_importances_"):
-                fdf = pd.DataFrame({
-                    "Factor":["Pregnancies","Glucose","BP","SkinThickness",
-                              "Insulin","BMI","Pedigree","Age"],
-                    "Importance": ML_MODEL.feature_importances_
-                }).sort_values("Importance",ascending=False)
-                fig = px.bar(fdf, x="Importance", y="Factor", orientation="h",
-                             color="Importance", color_continuous_scale="Purples",
-                             title="Feature Importances")
-                st.plotly_chart(_dark_fig(fig), use_container_width=True)
+            fig = _importance_figure()
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Feature importances not available for this model type.")
         with i2:
-            # ── FIX: removed trendline="lowess" — statsmodels not installed ──
             csv = os.path.join(current_dir,"enhanced_diabetes.csv")
             if os.path.exists(csv):
-                df2 = pd.read_csv(csv)
-                fig = px.scatter(df2, x="Glucose", y="BMI", color="Outcome",
-                                 hover_data=["Age"],
-                                 title="Glucose vs BMI (0=No Diabetes, 1=Diabetes)",
-                                 color_discrete_map={0:"#3fb950",1:"#f85149"})
-                # Manual trend lines using numpy polyfit
-                for outcome, col in [(0,"#3fb950"),(1,"#f85149")]:
-                    sub = df2[df2["Outcome"]==outcome]
-                    if len(sub) > 2:
-                        z = np.polyfit(sub["Glucose"], sub["BMI"], 1)
-                        x_line = np.linspace(sub["Glucose"].min(), sub["Glucose"].max(), 100)
-                        y_line = np.poly1d(z)(x_line)
-                        fig.add_trace(go.Scatter(x=x_line, y=y_line, mode="lines",
-                                                 line=dict(color=col, width=2, dash="dot"),
-                                                 name=f"Trend ({'No DM' if outcome==0 else 'DM'})"))
-                st.plotly_chart(_dark_fig(fig), use_container_width=True)
+                fig = go.Figure(_glucose_bmi_base(csv, os.path.getmtime(csv)))
+                fig.add_trace(go.Scatter(x=[gluc], y=[bmi], mode="markers", name="You",
+                                         marker=dict(color="#6C63FF", size=16, symbol="star",
+                                                     line=dict(color="white", width=1))))
+                st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("enhanced_diabetes.csv not found — place it in the app directory.")
 
@@ -899,9 +1057,11 @@ def page_app(submitted_data):
     </div>""", unsafe_allow_html=True)
 
     ft = st.tabs(["🩺 AI Doctor Chat","📈 Health Timeline","💊 Medication Planner"])
-    with ft[0]: tab_chat()
+    # Chat is drawn last: a streamed reply holds the script until it finishes,
+    # and the timeline and meds tabs must already be on the page by then
     with ft[1]: tab_timeline()
     with ft[2]: tab_meds()
+    with ft[0]: tab_chat()
 
 
 # =============================================================================
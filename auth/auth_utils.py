@@ -1,21 +1,47 @@
 import json
 import hashlib
 import os
+import sqlite3
 import jwt
 import datetime
 from typing import Optional, Tuple
 
+try:
+    from user_store import JsonUserStore, SQLiteUserStore, UserStore, migrate_json_to_sqlite
+except ImportError:
+    from auth.user_store import JsonUserStore, SQLiteUserStore, UserStore, migrate_json_to_sqlite
+
 USER_DB_PATH = "auth/user_db.json"
+USER_SQLITE_PATH = "auth/user_db.sqlite3"
+USER_DB_BACKEND = os.getenv("GLUCOCHECK_USER_DB", "json")  # "json" or "sqlite"
 JWT_SECRET = "your_super_secret_key"
 JWT_ALGORITHM = "HS256"
 JWT_EXP_DELTA_SECONDS = 3600  # 1 hour
 
+_store: Optional[UserStore] = None
+
+def get_store() -> UserStore:
+    """Return the configured storage backend"""
+    global _store
+    if _store is None:
+        if USER_DB_BACKEND == "sqlite":
+            _store = SQLiteUserStore(USER_SQLITE_PATH)
+        else:
+            _store = JsonUserStore(USER_DB_PATH)
+    return _store
+
+def user_cache_stats() -> dict:
+    """Hit/miss counters of the user-record cache (empty for uncached backends)"""
+    stats = getattr(get_store(), "cache_stats", None)
+    return stats() if stats else {}
+
 def initialize_user_db():
     """Create user database if it doesn't exist"""
-    if not os.path.exists(USER_DB_PATH):
-        os.makedirs(os.path.dirname(USER_DB_PATH), exist_ok=True)
-        with open(USER_DB_PATH, "w") as f:
-            json.dump({"users": {}}, f)
+    store = get_store()
+    migrate = isinstance(store, SQLiteUserStore) and not store.exists() and os.path.exists(USER_DB_PATH)
+    store.initialize()
+    if migrate:
+        migrate_json_to_sqlite(USER_DB_PATH, USER_SQLITE_PATH)
 
 def hash_password(password: str) -> str:
     """SHA-256 password hashing with salt"""
@@ -25,83 +51,64 @@ def hash_password(password: str) -> str:
 def register_user(username: str, password: str) -> bool:
     """Register new user"""
     initialize_user_db()
-    
-    with open(USER_DB_PATH, "r+") as f:
-        db = json.load(f)
-        if username in db["users"]:
-            return False
-        
-        db["users"][username] = {
-            "password_hash": hash_password(password),
-            "predictions": []
-        }
-        
-        f.seek(0)
-        json.dump(db, f, indent=4)
-        f.truncate()
-        return True
+
+    return get_store().add_user(username, {
+        "password_hash": hash_password(password),
+        "predictions": []
+    })
 
 def verify_user(username: str, password: str) -> bool:
     """Verify login credentials"""
-    if not os.path.exists(USER_DB_PATH):
+    store = get_store()
+    if not store.exists():
         return False
-    
-    with open(USER_DB_PATH, "r") as f:
-        db = json.load(f)
-        user = db["users"].get(username)
-        if not user:
-            return False
-        
-        return user["password_hash"] == hash_password(password)
+
+    user = store.get_user(username)
+    if not user:
+        return False
+
+    return user["password_hash"] == hash_password(password)
 
 def update_password(username: str, old_password: str, new_password: str) -> Tuple[bool, str]:
     """Update a user's password. Returns (status, message)."""
-    if not os.path.exists(USER_DB_PATH):
+    store = get_store()
+    if not store.exists():
         return False, "User database does not exist."
 
     try:
-        with open(USER_DB_PATH, "r+") as f:
-            db = json.load(f)
-            user = db["users"].get(username)
-
-            if not user:
-                return False, "User not found."
+        user = store.get_user(username)
 
-            if user["password_hash"] != hash_password(old_password):
-                return False, "Old password is incorrect."
+        if not user:
+            return False, "User not found."
 
-            db["users"][username]["password_hash"] = hash_password(new_password)
+        if user["password_hash"] != hash_password(old_password):
+            return False, "Old password is incorrect."
 
-            f.seek(0)
-            json.dump(db, f, indent=4)
-            f.truncate()
-            return True, "Password updated successfully."
-    except (json.JSONDecodeError, IOError) as e:
+        if not store.set_password_hash(username, hash_password(new_password)):
+            return False, "User not found."
+        return True, "Password updated successfully."
+    except (json.JSONDecodeError, IOError, sqlite3.Error) as e:
         return False, f"Error updating password: {e}"
 
 def delete_user(username: str, password: str) -> Tuple[bool, str]:
     """Delete a user from the database. Returns (status, message)."""
-    if not os.path.exists(USER_DB_PATH):
+    store = get_store()
+    if not store.exists():
         return False, "User database does not exist."
 
     try:
-        with open(USER_DB_PATH, "r+") as f:
-            db = json.load(f)
-            user = db["users"].get(username)
-
-            if not user:
-                return False, "User not found."
+        user = store.get_user(username)
 
-            if user["password_hash"] != hash_password(password):
-                return False, "Password incorrect."
+        if not user:
+            return False, "User not found."
 
-            del db["users"][username]
+        if user["password_hash"] != hash_password(password):
+            return False, "Password incorrect."
 
-            f.seek(0)
-            json.dump(db, f, indent=4)
-            f.truncate()
-            return True, "User deleted successfully."
-    except (json.JSONDecodeError, IOError) as e:
+        if not store.remove_user(username):
+            return False, "User not found."
+        return True, "User deleted successfully."
+    except (json.JSONDecodeError, IOError, sqlite3.Error) as e:
         return False, f"Error deleting user: {e}"
 
 def generate_token(username: str) -> str:
@@ -0,0 +1,318 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+try:
+    from sqlite_util import sqlite_conn
+except ImportError:  # run as a script from auth/
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from sqlite_util import sqlite_conn
+
+_REV = re.compile(rb'\{\s*"rev":\s*(\d+)')
+_REV_HEAD = 64
+
+class UserStore:
+    """Storage backend interface used by auth_utils"""
+
+    def initialize(self) -> None:
+        raise NotImplementedError
+
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def get_user(self, username: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def add_user(self, username: str, record: dict) -> bool:
+        """Insert a user; False if the username is taken"""
+        raise NotImplementedError
+
+    def set_password_hash(self, username: str, password_hash: str) -> bool:
+        raise NotImplementedError
+
+    def remove_user(self, username: str) -> bool:
+        raise NotImplementedError
+
+
+class _PendingWrite:
+    __slots__ = ("fn", "result", "error", "done")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.result = False
+        self.error = None
+        self.done = False
+
+
+class JsonUserStore(UserStore):
+    """Whole-file JSON store (auth/user_db.json) with an LRU read-through cache.
+
+    Cached records are tied to the revision counter every write stores at the
+    head of the file ("rev", read from the first bytes only), so writes from
+    other processes invalidate them however close together they land. Files
+    without a counter (written before it existed, or edited by hand) are
+    keyed on a hash of their content instead. This store's own writes clear
+    the cache and bump `version`.
+
+    Writes take an exclusive fcntl lock on `<path>.lock`, re-read the file and
+    replace it atomically (temp file + fsync + os.replace). Mutations queued by
+    concurrent threads are group-committed: whichever thread gets the lock
+    applies the whole queue with a single write and fsync.
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024):
+        self.path = path
+        self.cache_size = cache_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Optional[dict]]" = OrderedDict()
+        self._cache_sig = None
+        self._lock = threading.Lock()
+        self.commits = 0
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+
+    @staticmethod
+    def _signature_of(raw: bytes):
+        m = _REV.match(raw, 0, _REV_HEAD)
+        if m:
+            return ("rev", int(m.group(1)))
+        return ("sha256", hashlib.sha256(raw).digest())
+
+    def _signature(self):
+        with open(self.path, "rb") as f:
+            head = f.read(_REV_HEAD)
+            if _REV.match(head):
+                return self._signature_of(head)
+            return self._signature_of(head + f.read())
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_sig = None
+            self.version += 1
+
+    def cache_stats(self) -> dict:
+        """Record-cache hits and misses since start; `version` counts this store's own writes"""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                "hit_rate": self.hits / total if total else 0.0, "version": self.version}
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive cross-process lock (no-op where fcntl is unavailable)"""
+        with open(self.path + ".lock", "a") as lf:
+            if fcntl is not None:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _atomic_write(self, db: dict) -> None:
+        # the revision goes first so readers can check it without parsing the file
+        db = {"rev": db.get("rev", 0) + 1, **{k: v for k, v in db.items() if k != "rev"}}
+        d = os.path.dirname(self.path) or "."
+        fd, tmp = tempfile.mkstemp(dir=d, prefix=".user_db.", suffix=".tmp")
+        try:
+            try:
+                # keep the file's permissions (mkstemp creates 0600); a new file stays owner-only
+                os.chmod(tmp, stat.S_IMODE(os.stat(self.path).st_mode))
+            except FileNotFoundError:
+                pass
+            with os.fdopen(fd, "w") as f:
+                json.dump(db, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if hasattr(os, "O_DIRECTORY"):
+            dfd = os.open(d, os.O_DIRECTORY)
+            try:
+                os.fsync(dfd)
+            finally:
+                os.close(dfd)
+        self.commits += 1
+
+    def initialize(self) -> None:
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._file_lock():
+                if not os.path.exists(self.path):
+                    self._atomic_write({"users": {}})
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def get_user(self, username: str) -> Optional[dict]:
+        sig = self._signature()
+        with self._lock:
+            if sig != self._cache_sig:
+                self._cache.clear()
+                self._cache_sig = sig
+            elif username in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(username)
+                rec = self._cache[username]
+                return dict(rec) if rec is not None else None
+            self.misses += 1
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        rec = json.loads(raw)["users"].get(username)
+        sig = self._signature_of(raw)      # the file may have been replaced since the check
+
+        with self._lock:
+            if sig == self._cache_sig:
+                self._cache[username] = rec
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return dict(rec) if rec is not None else None
+
+    def _mutate(self, fn) -> bool:
+        """Queue `fn(users) -> bool` and wait until it is committed"""
+        op = _PendingWrite(fn)
+        with self._queue_lock:
+            self._queue.append(op)
+        with self._commit_lock:
+            if not op.done:
+                self._commit()
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    def _commit(self) -> None:
+        with self._queue_lock:
+            batch, self._queue = self._queue, []
+        try:
+            with self._file_lock():
+                with open(self.path, "r") as f:
+                    db = json.load(f)
+                changed = False
+                for op in batch:
+                    try:
+                        op.result = bool(op.fn(db["users"]))
+                        changed = changed or op.result
+                    except Exception as e:
+                        op.error = e
+                if changed:
+                    self._atomic_write(db)
+        except Exception as e:
+            for op in batch:
+                op.error = e
+        finally:
+            self._invalidate()
+            for op in batch:
+                op.done = True
+
+    def add_user(self, username: str, record: dict) -> bool:
+        def fn(users):
+            if username in users:
+                return False
+            users[username] = record
+            return True
+        return self._mutate(fn)
+
+    def set_password_hash(self, username: str, password_hash: str) -> bool:
+        def fn(users):
+            if username not in users:
+                return False
+            users[username]["password_hash"] = password_hash
+            return True
+        return self._mutate(fn)
+
+    def remove_user(self, username: str) -> bool:
+        return self._mutate(lambda users: users.pop(username, None) is not None)
+
+
+class SQLiteUserStore(UserStore):
+    """SQLite store: username primary key, WAL journal, row-level updates"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username      TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            predictions   TEXT NOT NULL DEFAULT '[]'
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite_conn(self.path, lambda conn: conn.execute(self.SCHEMA))
+
+    def initialize(self) -> None:
+        self._conn()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def get_user(self, username: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT password_hash, predictions FROM users WHERE username = ?",
+            (username,)).fetchone()
+        if row is None:
+            return None
+        return {"password_hash": row[0], "predictions": json.loads(row[1])}
+
+    def add_user(self, username: str, record: dict) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash, predictions) VALUES (?, ?, ?)",
+                (username, record["password_hash"], json.dumps(record.get("predictions", []))))
+            return cur.rowcount == 1
+
+    def set_password_hash(self, username: str, password_hash: str) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute("UPDATE users SET password_hash = ? WHERE username = ?",
+                               (password_hash, username))
+            return cur.rowcount == 1
+
+    def remove_user(self, username: str) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM users WHERE username = ?", (username,))
+            return cur.rowcount == 1
+
+
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str) -> int:
+    """Copy every user from the JSON store into SQLite. Returns rows inserted"""
+    with open(json_path, "r") as f:
+        users = json.load(f)["users"]
+    store = SQLiteUserStore(sqlite_path)
+    with store._conn() as conn:
+        cur = conn.executemany(
+            "INSERT OR IGNORE INTO users (username, password_hash, predictions) VALUES (?, ?, ?)",
+            [(u, r["password_hash"], json.dumps(r.get("predictions", []))) for u, r in users.items()])
+        return cur.rowcount
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="User store maintenance")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="copy users from the JSON store into SQLite")
+    m.add_argument("src", nargs="?", default="auth/user_db.json")
+    m.add_argument("dst", nargs="?", default="auth/user_db.sqlite3")
+    args = ap.parse_args()
+    print(f"Migrated {migrate_json_to_sqlite(args.src, args.dst)} users from {args.src} to {args.dst}")
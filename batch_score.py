@@ -0,0 +1,119 @@
+"""
+Headless batch scoring for clinic cohorts.
+
+Streams a CSV / Parquet cohort in chunks, scales and scores each chunk as one
+matrix with the same model artifacts the app uses, attaches the risk
+tier per row and writes the results out.
+
+    python batch_score.py cohort.csv -o scored.csv --chunksize 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_io import FEATURES, load_artifacts, model_ready, predict_proba
+from risk_tiers import AGE_GROUPS, BMI_CATS, TIER_NAMES, classify
+
+# ---- Input / output streaming ----
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def iter_chunks(path, chunksize):
+    """Yield DataFrame chunks of at most `chunksize` rows from a CSV or Parquet file."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class _Writer:
+    """Append scored chunks to a CSV or Parquet output file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._pq = None
+        self._first = True
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._pq is None:
+                self._pq = pq.ParquetWriter(self.path, table.schema)
+            self._pq.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a",
+                      header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._pq is not None:
+            self._pq.close()
+
+
+# ---- Scoring ----
+def score_chunk(df, model, scaler):
+    """Return `df` with probability + risk tier columns appended."""
+    missing = [c for c in FEATURES if c not in df.columns]
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {missing}")
+
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    prob = predict_proba(model, scaler, X)
+
+    tier, bmc, ag = classify(prob, X[:, 5], X[:, 7])
+    out = df.copy()
+    out["probability"] = prob
+    out["risk"] = pd.Categorical.from_codes(tier, TIER_NAMES)
+    out["bmi_cat"] = pd.Categorical.from_codes(bmc, BMI_CATS)
+    out["age_grp"] = pd.Categorical.from_codes(ag, AGE_GROUPS)
+    return out
+
+
+def score_file(src, dst, chunksize=100_000, model=None, scaler=None, log=print):
+    """Score `src` into `dst` chunk by chunk. Returns (rows, seconds)."""
+    if model is None:
+        model, scaler = load_artifacts()
+    if not model_ready(model, scaler):
+        raise FileNotFoundError("model.bundle or model.pkl + scaler.pkl not found")
+
+    writer = _Writer(dst)
+    rows, t0 = 0, time.perf_counter()
+    try:
+        for chunk in iter_chunks(src, chunksize):
+            writer.write(score_chunk(chunk, model, scaler))
+            rows += len(chunk)
+            dt = time.perf_counter() - t0
+            log(f"{rows:,} rows scored · {rows / dt:,.0f} rows/sec")
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - t0
+
+
+# ---- Main ----
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Batch-score a patient cohort.")
+    ap.add_argument("input", help="CSV or Parquet file with the 8 model features")
+    ap.add_argument("-o", "--output", help="output CSV/Parquet (default: <input>_scored.<ext>)")
+    ap.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk")
+    args = ap.parse_args(argv)
+
+    root, ext = os.path.splitext(args.input)
+    dst = args.output or f"{root}_scored{ext}"
+    rows, secs = score_file(args.input, dst, args.chunksize,
+                            log=lambda m: print(m, file=sys.stderr))
+    print(f"Scored {rows:,} rows in {secs:.2f}s "
+          f"({rows / max(secs, 1e-9):,.0f} rows/sec) → {dst}")
+
+
+if __name__ == "__main__":
+    main()
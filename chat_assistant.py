@@ -0,0 +1,256 @@
+"""
+OpenAI-backed diabetes assistant used by the app's chat tab.
+
+`ask` returns a whole reply (blocking). `stream` starts the request on a
+background thread pool and returns a ChatStream right away. The Streamlit
+script iterates it to render tokens as they arrive.
+
+One client (and its HTTP connection pool) is shared across requests. Each
+request gets a per-read `timeout` and up to `max_retries` reconnects. A stream
+that fails before its first token is retried the same way; once tokens have
+been shown it is not restarted.
+
+With a ChatCache attached, repeated questions are answered from disk and
+identical concurrent questions share one upstream call (see chat_cache.py).
+
+The openai package is imported and the client built on the first question,
+so opening the app does not pay for it.
+
+OPENAI_BASE_URL points the client at any OpenAI-compatible server, e.g.
+fake_openai_server.py for local testing.
+"""
+
+import importlib.util
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from chat_cache import bucket_context, prompt_hash
+from chat_history import QUESTION_TOKEN_LIMIT, truncate_tokens
+
+CHAT_MODEL     = "gpt-4o-mini"
+MAX_TOKENS     = 300
+TEMPERATURE    = 0.65
+REQUEST_TIMEOUT = 30.0     # seconds per connect / read
+MAX_RETRIES    = 2
+STREAM_WORKERS = 4
+
+_DONE = object()
+
+
+def _is_error(reply):
+    return reply.startswith(("Error:", "⚠️"))
+
+
+class ChatStream:
+    """A reply being produced on a background thread.
+
+    Iterating yields text deltas as they arrive and stops at the end of the
+    reply. `text` holds everything received so far.
+    """
+
+    def __init__(self, timeout=REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.text = ""
+        self.error = None
+        self.cancelled = threading.Event()
+        self.cached = False
+        self.finished = False
+        self._q = queue.Queue()
+
+    def _put(self, item):
+        self._q.put(item)
+
+    def __iter__(self):
+        # a second pass (e.g. result() after a loop) must not wait for another _DONE
+        while not self.finished:
+            try:
+                item = self._q.get(timeout=self.timeout)
+            except queue.Empty:
+                self.finished = True
+                self.cancelled.set()
+                self.error = "timed out waiting for the reply"
+                if self.text:
+                    self.text += " …(timed out)"
+                return
+            if item is _DONE:
+                self.finished = True
+                return
+            self.text += item
+            yield item
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def result(self):
+        """Drain the stream and return the full reply (or an error message)."""
+        for _ in self:
+            pass
+        if self.error and not self.text:
+            return f"Error: {self.error}"
+        return self.text.strip()
+
+
+class ChatAssistant:
+    SYSTEM = (
+        "You are a knowledgeable diabetes specialist AI. "
+        "Give accurate, evidence-based answers about diabetes prevention, management, "
+        "diet, exercise, and medication. Keep replies concise (≤150 words). "
+        "Always remind users to consult a qualified healthcare professional."
+    )
+
+    def __init__(self, api_key=None, base_url=None, timeout=REQUEST_TIMEOUT,
+                 max_retries=MAX_RETRIES, cache=None):
+        self.error  = None
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self.prompt_key = prompt_hash(self.SYSTEM, CHAT_MODEL, str(MAX_TOKENS), str(TEMPERATURE))
+        self._client = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self._key = api_key or os.getenv("OPENAI_API_KEY")
+        self._base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        if importlib.util.find_spec("openai") is None:
+            self.error = "openai package not installed (add to requirements.txt)."
+        elif not self._key:
+            self.error = "OPENAI_API_KEY not found in secrets or environment."
+
+    @property
+    def client(self):
+        """The OpenAI client, created on first use (None when chat is unavailable)."""
+        if self._client is None and self.error is None:
+            with self._lock:
+                if self._client is None and self.error is None:
+                    try:
+                        from openai import OpenAI
+                        self._client = OpenAI(api_key=self._key, base_url=self._base_url,
+                                              timeout=self.timeout, max_retries=self.max_retries)
+                    except Exception as e:
+                        self.error = str(e)
+                        return None
+                    self._pool = ThreadPoolExecutor(STREAM_WORKERS, thread_name_prefix="chat-stream")
+        return self._client
+
+    def messages(self, question, context="", history=None):
+        """Prompt messages; `history` is earlier turns already cut to a token budget."""
+        messages = [{"role": "system", "content": self.SYSTEM}]
+        if context:
+            messages.append({"role": "system", "content": f"User health context: {context}"})
+        messages.extend(history or ())
+        messages.append({"role": "user", "content": truncate_tokens(question, QUESTION_TOKEN_LIMIT)})
+        return messages
+
+    def _prompt_context(self, context, bucket):
+        # a cached reply is shared by the whole bucket, so it must not be
+        # written from one user's exact values
+        return bucket_context(bucket) if self.cache is not None and bucket is not None else context
+
+    def _cache_bucket(self, context, bucket, history):
+        b = context if bucket is None else bucket
+        # follow-ups depend on the conversation, so key them on it too
+        return f"{b}|{prompt_hash(*(t['content'] for t in history))}" if history else b
+
+    def ask(self, question: str, context: str = "", bucket=None, history=None) -> str:
+        """Whole reply. `bucket` is the coarse context the cache keys on (default: `context`);
+        when given and the cache is on, it replaces `context` in the prompt."""
+        if not self.client:
+            return f"⚠️ Chat unavailable: {self.error}"
+        messages = self.messages(question, self._prompt_context(context, bucket), history)
+        if self.cache is None:
+            return self._ask(messages)
+        try:
+            return self.cache.get_or_fetch(
+                question, self._cache_bucket(context, bucket, history), self.prompt_key,
+                lambda: self._ask(messages), is_error=_is_error)
+        except Exception as e:     # e.g. the duplicate we waited on timed out
+            return f"Error: {e}"
+
+    def _ask(self, messages):
+        try:
+            resp = self.client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE,
+            )
+            return resp.choices[0].message.content.strip()
+        except Exception as e:
+            return f"Error: {e}"
+
+    # ---- Streaming ----
+    def _produce(self, s, messages, done=None):
+        parts, t0 = [], time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    stream = self.client.chat.completions.create(
+                        model=CHAT_MODEL, messages=messages, max_tokens=MAX_TOKENS,
+                        temperature=TEMPERATURE, stream=True)
+                    with stream:
+                        for chunk in stream:
+                            if s.cancelled.is_set():
+                                return
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                started = True
+                                parts.append(delta)
+                                s._put(delta)
+                    return
+                except Exception as e:
+                    if started or attempt == self.max_retries or s.cancelled.is_set():
+                        s.error = str(e)
+                        if started:
+                            s._put(" …(connection lost)")
+                        return
+                    time.sleep(0.5 * 2 ** attempt)
+        finally:
+            try:
+                if done is not None:
+                    error = s.error or ("cancelled" if s.cancelled.is_set() else None)
+                    done("".join(parts).strip(), error, time.perf_counter() - t0)
+            finally:
+                s._put(_DONE)
+
+    def stream(self, question: str, context: str = "", bucket=None, history=None) -> ChatStream:
+        """Start a streamed reply on the background pool; returns immediately.
+
+        Cached replies (and duplicates of a question already in flight) arrive
+        as a single chunk with `cached` set.
+        """
+        s = ChatStream(self.timeout + 5)   # the client's own read timeout normally fires first
+        if not self.client:
+            s._put(f"⚠️ Chat unavailable: {self.error}")
+            s._put(_DONE)
+            return s
+        messages = self.messages(question, self._prompt_context(context, bucket), history)
+        if self.cache is None:
+            self._pool.submit(self._produce, s, messages)
+            return s
+
+        key = self.cache.key(question, self._cache_bucket(context, bucket, history), self.prompt_key)
+        hit = self.cache.lookup(key)
+        if hit is not None:
+            s.cached = True
+            s._put(hit)
+            s._put(_DONE)
+            return s
+        leader, fut = self.cache.claim(key)
+        if not leader:
+            s.cached = True
+            def publish(f):
+                e = f.exception()
+                s._put(f"Error: {e}" if e is not None else f.result())
+                s._put(_DONE)
+            fut.add_done_callback(publish)
+            return s
+
+        def done(text, error, latency):
+            ok = bool(text) and error is None
+            self.cache.release(key, question, text if ok else f"Error: {error}", latency, ok=ok)
+
+        self._pool.submit(self._produce, s, messages, done)
+        return s
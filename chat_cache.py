@@ -0,0 +1,188 @@
+"""
+Persistent response cache for the chat assistant.
+
+Most users ask the same handful of questions. Replies are stored in SQLite,
+keyed on the normalised question, a coarse health-context bucket (risk tier,
+BMI category, age group — not the exact values) and a hash of the system
+prompt + model, so changing the prompt invalidates old answers. With the
+cache on, the model only ever sees the bucket (`bucket_context`), so a
+shared reply can't carry another user's exact vitals. Entries
+expire after `ttl` seconds; past `max_entries` the least recently used go.
+
+Identical questions in flight at the same time share one upstream call: the
+first caller fetches, later ones wait on its Future.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlite_util import sqlite_conn
+
+CHAT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "auth", "chat_cache.sqlite3")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+COALESCE_WAIT = 120.0      # seconds a duplicate question waits on the leader's reply
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key       TEXT PRIMARY KEY,
+    question  TEXT NOT NULL,
+    reply     TEXT NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL,
+    latency   REAL NOT NULL,
+    hits      INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_question(q):
+    """Case-, punctuation- and whitespace-insensitive form of a question."""
+    return _SPACE.sub(" ", _PUNCT.sub(" ", q.lower())).strip()
+
+
+def context_bucket(entry):
+    """Coarse bucket for a health-history entry, e.g. 'High|Obese|Adult'."""
+    if not entry:
+        return ""
+    from risk_tiers import risk_profile
+    rec = risk_profile(entry["probability"], entry["bmi"], entry["age"])
+    return f"{rec['risk']}|{rec['bmi_cat']}|{rec['age_grp']}"
+
+
+def bucket_context(bucket):
+    """Prompt context for a bucket: 'High|Obese|Adult' → 'High risk, BMI Obese, Adult age group'."""
+    if not bucket:
+        return ""
+    risk, bmi_cat, age_grp = bucket.split("|")
+    return f"{risk} risk, BMI {bmi_cat}, {age_grp} age group"
+
+
+def prompt_hash(*parts):
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()[:16]
+
+
+class ChatCache:
+    """SQLite-backed reply cache with TTL, LRU size bound and in-flight coalescing."""
+
+    def __init__(self, path=CHAT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = self.misses = self.coalesced = 0
+        self.saved_seconds = 0.0
+
+    def _conn(self):
+        return sqlite_conn(self.path, lambda conn: conn.executescript(_SCHEMA))
+
+    @staticmethod
+    def key(question, bucket, prompt):
+        return hashlib.sha256(
+            f"{normalize_question(question)}\x1f{bucket}\x1f{prompt}".encode()).hexdigest()
+
+    # ---- Lookup / store ----
+    def lookup(self, key):
+        """Cached reply for `key`, or None (expired entries count as misses)."""
+        now = time.time()
+        with self._conn() as conn:
+            row = conn.execute("SELECT reply, latency FROM responses WHERE key = ? AND created > ?",
+                               (key, now - self.ttl)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                             (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += row[1]
+        return row[0]
+
+    def store(self, key, question, reply, latency):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses (key, question, reply, created, last_used, latency, hits) "
+                         "VALUES (?, ?, ?, ?, ?, ?, 0)", (key, question, reply, now, now, latency))
+            conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+            conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                         "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    # ---- Coalescing ----
+    def claim(self, key):
+        """(is_leader, future). The leader must call `release` when its fetch ends."""
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None:
+                entry[1] += 1
+                self.coalesced += 1
+                return False, entry[0]
+            self._inflight[key] = [Future(), 0]
+            return True, self._inflight[key][0]
+
+    def release(self, key, question, reply, latency, ok=True, error=None):
+        """Publish the leader's reply (or `error`) to waiters; cache it when `ok`.
+
+        Waiters are always released, even when the cache write fails.
+        """
+        try:
+            if ok and error is None:
+                self.store(key, question, reply, latency)
+        except sqlite3.Error:
+            pass       # e.g. "database is locked": the reply just isn't cached
+        finally:
+            with self._lock:
+                fut, waiters = self._inflight.pop(key, (None, 0))
+                self.saved_seconds += waiters * latency
+            if fut is not None:
+                if error is not None:
+                    fut.set_exception(error)
+                else:
+                    fut.set_result(reply)
+
+    def get_or_fetch(self, question, bucket, prompt, fetch, is_error=lambda r: False,
+                     wait=COALESCE_WAIT):
+        """Reply from the cache, an in-flight duplicate, or one call to `fetch()`.
+
+        A duplicate waits at most `wait` seconds and sees the leader's
+        exception if `fetch()` raised.
+        """
+        key = self.key(question, bucket, prompt)
+        reply = self.lookup(key)
+        if reply is not None:
+            return reply
+        leader, fut = self.claim(key)
+        if not leader:
+            return fut.result(timeout=wait)
+        t0 = time.perf_counter()
+        try:
+            reply = fetch()
+        except Exception as e:
+            self.release(key, question, "", time.perf_counter() - t0, ok=False, error=e)
+            raise
+        self.release(key, question, reply, time.perf_counter() - t0, ok=not is_error(reply))
+        return reply
+
+    # ---- Metrics ----
+    def stats(self):
+        """Lookups served from SQLite or a coalesced call vs. upstream calls, plus waiting saved."""
+        with self._lock:
+            total = self.hits + self.misses
+            out = {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                   "upstream_calls": self.misses - self.coalesced,
+                   # share of questions answered without their own upstream call
+                   "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+                   "saved_seconds": self.saved_seconds}
+        out["entries"] = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return out
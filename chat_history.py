@@ -0,0 +1,91 @@
+"""
+Chat transcript model for the chat tab.
+
+Each message is formatted once when it is appended: its "HH:MM" stamp and
+its HTML bubble are stored with it. A rerun only joins the cached HTML of
+the messages on screen (the last N, paged with "load earlier") and never
+re-parses timestamps. `context_turns` picks the most recent turns that fit
+a token budget, for the model's conversation context.
+"""
+
+import datetime
+import html
+
+PAGE_SIZE = 20
+CONTEXT_TOKEN_BUDGET = 1200     # prompt tokens spent on earlier turns
+QUESTION_TOKEN_LIMIT = 500
+_MSG_OVERHEAD = 4               # per-message framing tokens in the chat format
+
+_EMPTY = ("<p style='text-align:center;color:rgba(255,255,255,.25);padding:28px 0'>"
+          "No messages yet — ask below!</p>")
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def truncate_tokens(text, limit):
+    """`text` cut to roughly `limit` tokens."""
+    return text if estimate_tokens(text) <= limit else text[: limit * 4].rstrip() + " …"
+
+
+def _bubble(role, text, hhmm=None):
+    t = html.escape(text)
+    if role == "user":
+        return f"<div class='msg-user'>{t}<div class='msg-t' style='text-align:right'>{hhmm}</div></div>"
+    stamp = f"<div class='msg-t'>{hhmm}</div>" if hhmm else ""
+    return f"<div class='msg-ai'><strong>AI Doctor:</strong> {t}{stamp}</div>"
+
+
+class ChatHistory:
+    """Append-only list of chat messages with pre-rendered HTML."""
+
+    def __init__(self):
+        self.messages = []
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __bool__(self):
+        return bool(self.messages)
+
+    def append(self, role, text, now=None):
+        now = now or datetime.datetime.now()
+        hhmm = now.strftime("%H:%M")
+        self.messages.append({"role": role, "text": text,
+                              "ts": now.strftime("%Y%m%d%H%M%S%f"), "hhmm": hhmm,
+                              "html": _bubble(role, text, hhmm)})
+
+    def clear(self):
+        self.messages.clear()
+
+    def render(self, limit=PAGE_SIZE, pending=None):
+        """Transcript HTML for the last `limit` messages (plus a reply in progress)."""
+        shown = self.messages[-limit:] if limit else self.messages
+        parts = ["<div class='chat-box'>"]
+        if not self.messages and pending is None:
+            parts.append(_EMPTY)
+        hidden = len(self.messages) - len(shown)
+        if hidden:
+            parts.append(f"<p class='msg-t' style='text-align:center'>{hidden} earlier "
+                         f"message{'s' if hidden > 1 else ''} hidden</p>")
+        parts.extend(m["html"] for m in shown)
+        if pending is not None:
+            parts.append(_bubble("ai", pending))
+        parts.append("</div>")
+        return "".join(parts)
+
+    def context_turns(self, budget=CONTEXT_TOKEN_BUDGET):
+        """Most recent turns, oldest first, as chat messages within `budget` tokens."""
+        turns, used = [], 0
+        for m in reversed(self.messages):
+            if m["text"].startswith(("Error:", "⚠️")):
+                continue
+            cost = estimate_tokens(m["text"]) + _MSG_OVERHEAD
+            if used + cost > budget:
+                break
+            turns.append({"role": "user" if m["role"] == "user" else "assistant",
+                          "content": m["text"]})
+            used += cost
+        return turns[::-1]
@@ -0,0 +1,129 @@
+"""
+Minimal OpenAI-compatible chat server for testing the chat tab offline.
+
+Serves POST /v1/chat/completions (plain JSON or `stream=true` server-sent
+events) with a canned reply, plus knobs to exercise the client's timeout and
+retry handling. GET /stats reports how many completions were requested.
+
+    python fake_openai_server.py --port 8700 --token-ms 30
+    OPENAI_BASE_URL=http://127.0.0.1:8700/v1 OPENAI_API_KEY=fake streamlit run app.py
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("Good question about {q!r}. Focus on whole foods, fibre and regular activity, "
+         "and keep an eye on portion sizes. Please consult a qualified healthcare "
+         "professional before changing your treatment.")
+
+
+class FakeState:
+    def __init__(self, token_ms=30, fail_first=0, stall_after=None):
+        self.token_ms, self.fail_first, self.stall_after = token_ms, fail_first, stall_after
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def next_request(self):
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _json(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._json(200, {"requests": state.requests})
+            elif self.path.rstrip("/").endswith("/models"):
+                self._json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+            else:
+                self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._json(404, {"error": {"message": "not found"}})
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            n = state.next_request()
+            if n <= state.fail_first:
+                return self._json(500, {"error": {"message": f"injected failure {n}"}})
+            question = next((m["content"] for m in reversed(req.get("messages", []))
+                             if m.get("role") == "user"), "")
+            text = REPLY.format(q=question[:60])
+            cid, model = f"chatcmpl-{uuid.uuid4().hex[:12]}", req.get("model", "gpt-4o-mini")
+            if not req.get("stream"):
+                time.sleep(state.token_ms * len(text.split()) / 1000)
+                return self._json(200, {
+                    "id": cid, "object": "chat.completion", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": text}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}})
+            self._stream(cid, model, text)
+
+        def _stream(self, cid, model, text):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(delta, finish=None):
+                chunk = {"id": cid, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model,
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            event({"role": "assistant", "content": ""})
+            for i, word in enumerate(text.split(" ")):
+                if state.stall_after is not None and i >= state.stall_after:
+                    time.sleep(3600)
+                time.sleep(state.token_ms / 1000)
+                event({"content": word if i == 0 else " " + word})
+            event({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8700, **kw):
+    httpd = ThreadingHTTPServer((host, port), make_handler(FakeState(**kw)))
+    httpd.daemon_threads = True
+    return httpd
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fake OpenAI-compatible chat server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8700)
+    ap.add_argument("--token-ms", type=float, default=30, help="delay between streamed tokens")
+    ap.add_argument("--fail-first", type=int, default=0, help="answer the first N requests with 500")
+    ap.add_argument("--stall-after", type=int, default=None,
+                    help="stop sending after N tokens (exercises the read timeout)")
+    args = ap.parse_args()
+    httpd = serve(args.host, args.port, token_ms=args.token_ms,
+                  fail_first=args.fail_first, stall_after=args.stall_after)
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,185 @@
+"""
+Append-only per-user event log for assessments and medication changes.
+
+Every event is a single INSERT into an SQLite table indexed by
+(username, kind, ts), so recording a prediction is O(1) and the timeline can
+pull just the window it needs. Medication lists are rebuilt by replaying the
+user's med_add / med_remove events.
+
+Recording an assessment also folds it into per-user daily and weekly rollups
+(count, mean / max / last probability) in the same transaction. The
+timeline can therefore chart years of history without reading every event.
+"""
+
+import datetime
+import json
+import os
+import uuid
+
+from sqlite_util import sqlite_conn
+
+HISTORY_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "auth", "user_events.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    ts       TEXT NOT NULL,
+    kind     TEXT NOT NULL,
+    payload  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_user_kind_ts ON events (username, kind, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    username TEXT NOT NULL,
+    period   TEXT NOT NULL,          -- 'day' | 'week'
+    bucket   TEXT NOT NULL,          -- ISO date of the day / the week's Monday
+    n        INTEGER NOT NULL,
+    sum_prob REAL NOT NULL,
+    max_prob REAL NOT NULL,
+    last_prob REAL NOT NULL,
+    last_ts  TEXT NOT NULL,
+    PRIMARY KEY (username, period, bucket)
+) WITHOUT ROWID;
+"""
+_SCHEMA_VERSION = 1     # 1: rollups table (backfilled from existing events)
+
+ROLLUP_PERIODS = ("day", "week")
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (username, period, bucket, n, sum_prob, max_prob, last_prob, last_ts)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (username, period, bucket) DO UPDATE SET
+    n = n + 1,
+    sum_prob = sum_prob + excluded.sum_prob,
+    max_prob = max(max_prob, excluded.max_prob),
+    last_prob = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_prob ELSE last_prob END,
+    last_ts = max(last_ts, excluded.last_ts)
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+
+
+def _buckets(ts):
+    """(day, week) bucket keys for a 'YYYY-MM-DD[ HH:MM…]' timestamp."""
+    day = datetime.date.fromisoformat(ts[:10])
+    return day.isoformat(), (day - datetime.timedelta(days=day.weekday())).isoformat()
+
+
+def _add_rollup(conn, username, entry, ts):
+    p = float(entry["probability"])
+    ts = entry.get("date") or ts
+    for period, bucket in zip(ROLLUP_PERIODS, _buckets(ts)):
+        conn.execute(_UPSERT_ROLLUP, (username, period, bucket, p, p, p, ts))
+
+
+class HistoryStore:
+    """Per-user event log backed by SQLite (WAL, one connection per thread)."""
+
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+
+    def _conn(self):
+        return sqlite_conn(self.path, self._init_schema)
+
+    def _init_schema(self, conn):
+        conn.executescript(_SCHEMA)
+        if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._rebuild_rollups(conn)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    @staticmethod
+    def _rebuild_rollups(conn):
+        with conn:
+            conn.execute("DELETE FROM rollups")
+            for username, ts, payload in conn.execute(
+                    "SELECT username, ts, payload FROM events WHERE kind = 'assessment' "
+                    "ORDER BY id").fetchall():
+                _add_rollup(conn, username, json.loads(payload), ts)
+
+    # ---- Writes (append only) ----
+    def append(self, username, kind, payload, ts=None):
+        with self._conn() as conn:
+            conn.execute("INSERT INTO events (username, ts, kind, payload) VALUES (?, ?, ?, ?)",
+                         (username, ts or _now(), kind, json.dumps(payload)))
+
+    def record_assessment(self, username, entry):
+        """Append one assessment entry (the dict the timeline renders) and update its rollups."""
+        ts = _now()
+        with self._conn() as conn:
+            conn.execute("INSERT INTO events (username, ts, kind, payload) VALUES (?, ?, ?, ?)",
+                         (username, ts, "assessment", json.dumps(entry)))
+            _add_rollup(conn, username, entry, ts)
+
+    def add_medication(self, username, med):
+        """Append a med_add event; returns the medication with its new `id`."""
+        med = dict(med, id=uuid.uuid4().hex)
+        self.append(username, "med_add", med)
+        return med
+
+    def remove_medication(self, username, med_id):
+        self.append(username, "med_remove", {"id": med_id})
+
+    # ---- Reads ----
+    def assessments(self, username, since=None, until=None, limit=None, offset=0):
+        """Assessment entries for `username`, oldest first.
+
+        `since` / `until` bound the window (datetime or ISO string);
+        `limit` keeps only the most recent N entries of that window, after
+        skipping the `offset` most recent (for paging newest-first).
+        """
+        sql = "SELECT payload FROM events WHERE username = ? AND kind = 'assessment'"
+        args = [username]
+        if since is not None:
+            sql += " AND ts >= ?"; args.append(str(since))
+        if until is not None:
+            sql += " AND ts < ?";  args.append(str(until))
+        sql += " ORDER BY ts DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"; args += [int(limit), int(offset)]
+        rows = self._conn().execute(sql, args).fetchall()
+        return [json.loads(p) for (p,) in reversed(rows)]
+
+    def count_assessments(self, username, since=None):
+        sql = "SELECT COUNT(*) FROM events WHERE username = ? AND kind = 'assessment'"
+        args = [username]
+        if since is not None:
+            sql += " AND ts >= ?"; args.append(str(since))
+        return self._conn().execute(sql, args).fetchone()[0]
+
+    def assessment_series(self, username, since=None):
+        """(timestamps, probabilities) for every assessment in the window, oldest first."""
+        sql = ("SELECT ts, json_extract(payload, '$.probability') FROM events "
+               "WHERE username = ? AND kind = 'assessment'")
+        args = [username]
+        if since is not None:
+            sql += " AND ts >= ?"; args.append(str(since))
+        rows = self._conn().execute(sql + " ORDER BY ts, id", args).fetchall()
+        return [r[0] for r in rows], [r[1] for r in rows]
+
+    def rollups(self, username, period="day", since=None):
+        """Daily or weekly aggregates, oldest first: bucket, n, mean, max, last."""
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"period must be one of {ROLLUP_PERIODS}")
+        sql = ("SELECT bucket, n, sum_prob / n, max_prob, last_prob FROM rollups "
+               "WHERE username = ? AND period = ?")
+        args = [username, period]
+        if since is not None:
+            sql += " AND bucket >= ?"; args.append(_buckets(str(since))[ROLLUP_PERIODS.index(period)])
+        rows = self._conn().execute(sql + " ORDER BY bucket", args).fetchall()
+        return [dict(zip(("bucket", "n", "mean", "max", "last"), r)) for r in rows]
+
+    def medications(self, username):
+        """Current medication list, rebuilt from the user's med events."""
+        meds = {}
+        for kind, payload in self._conn().execute(
+                "SELECT kind, payload FROM events WHERE username = ? "
+                "AND kind IN ('med_add', 'med_remove') ORDER BY id", (username,)):
+            p = json.loads(payload)
+            if kind == "med_add":
+                meds[p["id"]] = p
+            else:
+                meds.pop(p["id"], None)
+        return list(meds.values())
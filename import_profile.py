@@ -0,0 +1,126 @@
+"""
+Import-time profile of the app's cold start.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter (best of
+`--runs`) and summarises the report: total import time, the packages that
+cost the most, and whether any of the modules the app defers until first
+use (openai, reportlab, xgboost, ...) were loaded anyway. The last saved
+summary is tracked in import_profile.json; `--check` fails on a deferred
+module being imported at startup or on the total regressing past the
+tolerance.
+
+    python import_profile.py                 # print the summary
+    python import_profile.py --save          # update import_profile.json
+    python import_profile.py --check         # compare with import_profile.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BASE_DIR, "import_profile.json")
+
+# Loaded on first use only: PDF export, chat, first assessment, planner / timeline
+DEFERRED = ("reportlab", "openai", "xgboost", "joblib", "sklearn",
+            "plotly.express", "streamlit_calendar")
+DEFAULT_TOLERANCE = 0.25
+
+
+def parse_importtime(stderr):
+    """[(name, self_us, cumulative_us, depth)] from a `-X importtime` report."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue                                   # the column header
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append((stripped, int(parts[0]), int(parts[1]), (len(name) - len(stripped)) // 2))
+    return rows
+
+
+def run_importtime(target="app", python=sys.executable, cwd=BASE_DIR):
+    """One cold import of `target` in a fresh interpreter; parsed report rows."""
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {target}"],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def summarize(rows, target="app", top=15):
+    """Total, per-package self time (top N) and which deferred modules got imported."""
+    total = sum(r[1] for r in rows)
+    packages = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    ranked = sorted(packages.items(), key=lambda kv: -kv[1])[:top]
+    loaded = {r[0] for r in rows}
+    target_ms = next((r[2] for r in rows if r[0] == target), 0) / 1000
+    return {"target": target, "python": platform.python_version(),
+            "total_ms": round(total / 1000, 1), "target_ms": round(target_ms, 1),
+            "modules": len(rows),
+            "packages_ms": {k: round(v / 1000, 1) for k, v in ranked},
+            "deferred_loaded": sorted(m for m in DEFERRED if m in loaded)}
+
+
+def profile(target="app", runs=3, top=15, python=sys.executable):
+    """Summary of the fastest of `runs` cold imports."""
+    return min((summarize(run_importtime(target, python), target, top) for _ in range(runs)),
+               key=lambda s: s["total_ms"])
+
+
+def check(summary, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Problems with `summary` compared to `baseline` (empty when it passes)."""
+    problems = [f"{m} is imported at startup" for m in summary["deferred_loaded"]]
+    limit = baseline["total_ms"] * (1 + tolerance)
+    if summary["total_ms"] > limit:
+        problems.append(f"total import time {summary['total_ms']:.0f} ms exceeds "
+                        f"{limit:.0f} ms (baseline {baseline['total_ms']:.0f} ms + {tolerance:.0%})")
+    return problems
+
+
+def report(summary):
+    lines = [f"import {summary['target']}: {summary['total_ms']:.0f} ms total, "
+             f"{summary['target_ms']:.0f} ms cumulative for the app, "
+             f"{summary['modules']} modules (Python {summary['python']})",
+             "",
+             f"{'package':<24}{'self ms':>10}"]
+    lines += [f"{k:<24}{v:>10.1f}" for k, v in summary["packages_ms"].items()]
+    lines += ["", "deferred modules imported at startup: "
+              + (", ".join(summary["deferred_loaded"]) or "none")]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Summarise `python -X importtime` for the app's cold start.")
+    ap.add_argument("--target", default="app", help="module to import (default: app)")
+    ap.add_argument("--runs", type=int, default=3, help="cold imports; the fastest is reported")
+    ap.add_argument("--top", type=int, default=15, help="packages to list")
+    ap.add_argument("--save", action="store_true", help=f"write the summary to {os.path.basename(BASELINE_PATH)}")
+    ap.add_argument("--check", action="store_true", help="fail on a regression against the saved summary")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = ap.parse_args()
+
+    summary = profile(args.target, args.runs, args.top)
+    print(report(summary))
+    if args.save:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+        print(f"\nsaved {BASELINE_PATH}")
+    if args.check:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        problems = check(summary, baseline, args.tolerance)
+        for p in problems:
+            print(f"FAIL: {p}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,79 @@
+"""
+Medication schedule engine for the planner calendar.
+
+Each medication becomes a recurrence rule: a start date, a repeat interval
+(daily frequencies repeat every day at the chosen times of day, Weekly on the
+start date's weekday) and its time slots, one per dose of the frequency (see
+`times_for`). Calendar events are expanded only
+for the requested date range, jumping straight to the first occurrence in it,
+so cost scales with what is on screen rather than with the medication history.
+"""
+
+import datetime
+import hashlib
+import json
+from collections import namedtuple
+
+PERIODS = {"Morning":("08:00:00","09:00:00"), "Afternoon":("12:00:00","13:00:00"),
+           "Evening":("18:00:00","19:00:00"), "Night":("21:00:00","22:00:00")}
+FREQ_INTERVAL_DAYS = {"Once daily":1, "Twice daily":1, "Three times daily":1, "Weekly":7}
+FREQ_DOSES = {"Once daily":1, "Twice daily":2, "Three times daily":3, "Weekly":1}
+DEFAULT_TIMES = {1:("Morning",), 2:("Morning","Evening"), 3:("Morning","Afternoon","Night")}
+PALETTE = ["#6C63FF","#FF6B6B","#3fb950","#d29922","#4D44DB"]
+
+Rule = namedtuple("Rule", "title color start interval slots")
+
+
+def med_list_version(meds):
+    """Content hash of a medication list; changes whenever a med is added or removed."""
+    key = [(m.get("id"), m["name"], m["dose"], m["freq"], m["times"], m.get("start"))
+           for m in meds]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()[:16]
+
+
+def times_for(freq, times=()):
+    """Times of day for one day's doses: the chosen ones, topped up from the
+    frequency's defaults when fewer were picked than it has doses."""
+    n = FREQ_DOSES.get(freq, 1)
+    chosen = [p for p in times if p in PERIODS]
+    extra = [p for p in DEFAULT_TIMES[n] + tuple(PERIODS) if p not in chosen]
+    return chosen + extra[:max(0, n - len(chosen))]
+
+
+def rules_for(meds, today=None):
+    """One Rule per medication (meds without a start date start `today`)."""
+    today = today or datetime.date.today()
+    rules = []
+    for i, m in enumerate(meds):
+        start = datetime.date.fromisoformat(m["start"]) if m.get("start") else today
+        slots = tuple(PERIODS[p] for p in times_for(m["freq"], m["times"]))
+        rules.append(Rule(f"{m['name']} ({m['dose']})", PALETTE[i % len(PALETTE)], start,
+                          FREQ_INTERVAL_DAYS.get(m["freq"], 1), slots))
+    return rules
+
+
+def occurrences(rule, first, last):
+    """Dates in [first, last) on which `rule` fires."""
+    lo = max(first, rule.start)
+    skip = -(-(lo - rule.start).days // rule.interval)      # ceil division
+    d, step = rule.start + datetime.timedelta(days=skip * rule.interval), datetime.timedelta(days=rule.interval)
+    while d < last:
+        yield d
+        d += step
+
+
+def expand(rules, first, last):
+    """Calendar events for every rule between `first` (inclusive) and `last` (exclusive)."""
+    events = []
+    for r in rules:
+        for d in occurrences(r, first, last):
+            day = d.isoformat()
+            for s, e in r.slots:
+                events.append({"title": r.title, "color": r.color,
+                               "start": f"{day}T{s}", "end": f"{day}T{e}"})
+    return events
+
+
+def week_start(day):
+    """Sunday on or before `day` (the calendar's first weekday)."""
+    return day - datetime.timedelta(days=(day.weekday() + 1) % 7)
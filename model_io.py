@@ -0,0 +1,304 @@
+"""
+Model artifact loading / scoring helpers (no Streamlit dependency).
+
+Two on-disk formats are supported:
+
+* model.bundle — single versioned file written by `write_bundle`. The
+  StandardScaler is folded into the booster's split thresholds, so the
+  booster scores raw features directly and no scaler pass is needed.
+* model.pkl + scaler.pkl — the original joblib pickles (fallback).
+
+Bundle layout: MAGIC | uint32 header length | JSON header | pad to 8 | booster
+(UBJSON). The header carries the feature order, scaler parameters, booster
+offset/length and a SHA-256 content hash.
+"""
+
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+
+import numpy as np
+
+# Column order the scaler and model were fitted on (diabetes.csv minus Outcome)
+FEATURES = ["Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+            "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"]
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BUNDLE_NAME    = "model.bundle"
+BUNDLE_MAGIC   = b"GCBNDL\x00\x01"
+BUNDLE_VERSION = 1
+# XGBoost doesn't persist these; bundles record them as meta["train_params"]
+TRAIN_PARAM_KEYS = ("learning_rate", "max_depth", "subsample", "colsample_bytree", "min_child_weight")
+
+
+# ---- Bundled model ----
+class BundledModel:
+    """XGBoost booster with the scaler folded in; takes raw feature rows."""
+
+    scaler_folded = True
+
+    def __init__(self, booster, header):
+        self.booster  = booster
+        self.header   = header
+        self.features = header["features"]
+        self.version  = header["sha256"][:12]
+        best = header.get("best_iteration")
+        self._range = (0, int(best) + 1) if best is not None else (0, 0)
+
+    def predict_proba(self, X):
+        p = self.booster.inplace_predict(np.asarray(X, dtype=np.float32),
+                                         iteration_range=self._range)
+        return np.column_stack([1 - p, p])
+
+    @property
+    def feature_importances_(self):
+        score = self.booster.get_score(importance_type="gain")
+        imp = np.array([score.get(f"f{i}", 0.0) for i in range(len(self.features))],
+                       dtype=np.float32)
+        total = imp.sum()
+        return imp / total if total else imp
+
+
+def _fold_scaler(booster, scaler):
+    """Copy of `booster` whose split thresholds are in raw (unscaled) feature space."""
+    import xgboost as xgb
+    from tree_eval import fold_thresholds
+
+    model = json.loads(booster.save_raw("json"))
+    mean, scale = np.asarray(scaler.mean_, float), np.asarray(scaler.scale_, float)
+    for tree in model["learner"]["gradient_booster"]["model"]["trees"]:
+        lc = np.asarray(tree["left_children"])
+        f  = np.asarray(tree["split_indices"])
+        s  = np.asarray(tree["split_conditions"], np.float64)
+        inner = lc != -1
+        s[inner] = fold_thresholds(s[inner], mean[f[inner]], scale[f[inner]])
+        tree["split_conditions"] = s.tolist()
+    folded = xgb.Booster()
+    folded.load_model(bytearray(json.dumps(model).encode()))
+    return folded
+
+
+def write_bundle(path, model, scaler, features=FEATURES, meta=None, prefolded=False):
+    """Write `model` + `scaler` as one versioned bundle file. Returns the header.
+
+    With `prefolded=True` the booster already takes raw features (e.g. it was
+    warm-started from a bundle); `scaler` may then be the header's
+    {"mean", "scale"} dict and is only recorded, not folded in again.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    if isinstance(scaler, dict):
+        scaler_params = {"mean": list(scaler["mean"]), "scale": list(scaler["scale"])}
+    else:
+        scaler_params = {"mean": np.asarray(scaler.mean_).tolist(),
+                         "scale": np.asarray(scaler.scale_).tolist()}
+    blob = bytes((booster if prefolded else _fold_scaler(booster, scaler)).save_raw("ubj"))
+
+    digest = hashlib.sha256(blob)
+    digest.update(json.dumps([list(features), scaler_params], sort_keys=True).encode())
+    best = getattr(model, "best_iteration", None) if hasattr(model, "get_booster") else None
+    header = {
+        "format": BUNDLE_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "features": list(features),
+        "scaler": scaler_params,
+        "booster": {"encoding": "ubj", "offset": 0, "length": len(blob)},
+        "best_iteration": best,
+        "sha256": digest.hexdigest(),
+        "meta": meta or {},
+    }
+    # the booster offset is part of the header, so iterate until it settles
+    while True:
+        hjson = json.dumps(header).encode()
+        start = len(BUNDLE_MAGIC) + 4 + len(hjson)
+        if header["booster"]["offset"] >= start:
+            break
+        header["booster"]["offset"] = start + (-start % 8)
+    pad = header["booster"]["offset"] - (len(BUNDLE_MAGIC) + 4 + len(hjson))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(BUNDLE_MAGIC + struct.pack("<I", len(hjson)) + hjson + b" " * pad + blob)
+    os.replace(tmp, path)
+    return header
+
+
+def read_bundle_header(path):
+    """Parse just the JSON header of a bundle file."""
+    with open(path, "rb") as f:
+        if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not a model bundle")
+        (n,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(n))
+
+
+def _load_booster_from(booster, buf):
+    """Parse a serialised booster straight out of `buf` (any writable buffer).
+
+    Booster.load_model only takes a bytearray, which would mean copying the
+    mapped payload first; the underlying C entry point reads from a pointer.
+    Those are xgboost internals, so if they move the public copy is used.
+    """
+    import ctypes
+    try:
+        from xgboost.core import _LIB, _check_call, c_bst_ulong
+    except ImportError:
+        booster.load_model(bytearray(buf))
+        return
+
+    ptr = (ctypes.c_char * len(buf)).from_buffer(buf)
+    try:
+        _check_call(_LIB.XGBoosterLoadModelFromBuffer(booster.handle, ptr, c_bst_ulong(len(buf))))
+    finally:
+        del ptr
+
+
+def load_bundle(path, verify=True):
+    """Memory-map a bundle and load its booster. Returns a BundledModel.
+
+    The mapping is copy-on-write (nothing writes to it), so the hash check and
+    XGBoost's parser read the booster bytes from the page cache with no copy.
+    """
+    import xgboost as xgb
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) as mm:
+        if mm[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not a model bundle")
+        (n,) = struct.unpack_from("<I", mm, len(BUNDLE_MAGIC))
+        hstart = len(BUNDLE_MAGIC) + 4
+        header = json.loads(mm[hstart:hstart + n])
+        if header.get("format") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle format {header.get('format')}")
+        off, ln = header["booster"]["offset"], header["booster"]["length"]
+        if off + ln > len(mm):
+            raise ValueError(f"{path}: truncated bundle")
+
+        with memoryview(mm)[off:off + ln] as blob:
+            if verify:
+                digest = hashlib.sha256(blob)
+                digest.update(json.dumps([header["features"], header["scaler"]], sort_keys=True).encode())
+                if digest.hexdigest() != header["sha256"]:
+                    raise ValueError(f"{path}: content hash mismatch")
+            booster = xgb.Booster()
+            _load_booster_from(booster, blob)
+    return BundledModel(booster, header)
+
+
+# ---- Feature importance ----
+IMPORTANCE_NAME  = "feature_importance.json"
+IMPORTANCE_TYPES = ("gain", "cover", "weight", "total_gain", "total_cover")
+
+
+def feature_importance_table(model):
+    """Normalised importances per XGBoost importance type, in FEATURES order."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else getattr(model, "booster", model)
+    keys = booster.feature_names or [f"f{i}" for i in range(len(FEATURES))]
+    table = {}
+    for kind in IMPORTANCE_TYPES:
+        score = booster.get_score(importance_type=kind)
+        vals = np.array([score.get(k, 0.0) for k in keys], dtype=np.float64)
+        total = vals.sum()
+        table[kind] = (vals / total if total else vals).round(6).tolist()
+    return table
+
+
+def write_feature_importance(path, model):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"features": FEATURES, "importance": feature_importance_table(model)}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_feature_importance(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ---- Loading / scoring ----
+TREE_EVAL_MAX_ROWS = 32     # below this the NumPy evaluator beats an XGBoost predict call
+
+_TREES = weakref.WeakKeyDictionary()     # model -> (scaler, TreePredictor or None)
+_TREES_LOCK = threading.Lock()
+
+def load_artifacts(base_dir=BASE_DIR):
+    """Load (model, scaler). Prefers model.bundle (scaler is then None);
+    otherwise model.pkl / scaler.pkl, where missing files give None."""
+    bp = os.path.join(base_dir, BUNDLE_NAME)
+    if os.path.exists(bp):
+        return load_bundle(bp), None
+
+    import joblib
+    mp = os.path.join(base_dir, "model.pkl")
+    sp = os.path.join(base_dir, "scaler.pkl")
+    m = joblib.load(mp) if os.path.exists(mp) else None
+    s = joblib.load(sp) if os.path.exists(sp) else None
+    return m, s
+
+
+def model_ready(model, scaler):
+    """True when (model, scaler) can score — bundles need no separate scaler."""
+    return model is not None and (scaler is not None or getattr(model, "scaler_folded", False))
+
+
+def _tree_predictor(model, scaler):
+    """TreePredictor for (model, scaler), flattened once per model; None if unsupported."""
+    try:
+        hit = _TREES.get(model)
+    except TypeError:                    # not weak-referenceable
+        return None
+    if hit is not None and hit[0] is scaler:
+        return hit[1]
+    from tree_eval import TreePredictor
+    with _TREES_LOCK:
+        hit = _TREES.get(model)
+        if hit is None or hit[0] is not scaler:
+            try:
+                tp = TreePredictor.from_model(model, scaler)
+            except Exception:
+                tp = None                # not an XGBoost model; always use predict_proba
+            hit = _TREES[model] = (scaler, tp)
+    return hit[1]
+
+
+def predict_proba(model, scaler, X):
+    """Diabetes probability for every row of the raw (n, 8) feature matrix X.
+
+    Small batches (single assessments, small service batches) go through the
+    flattened NumPy trees in tree_eval.py, larger ones through XGBoost.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) <= TREE_EVAL_MAX_ROWS:
+        tp = _tree_predictor(model, scaler)
+        if tp is not None:
+            return tp.predict(X)
+    if scaler is None:
+        return model.predict_proba(X)[:, 1]
+    return model.predict_proba(scaler.transform(X))[:, 1]
+
+
+if __name__ == "__main__":
+    # Convert the legacy pickles into a bundle next to them
+    import argparse
+    ap = argparse.ArgumentParser(description="Convert model.pkl + scaler.pkl into a model bundle.")
+    ap.add_argument("--source", default="diabetes.csv",
+                    help="CSV the pickled model was trained on (recorded as the refresh watermark)")
+    ap.add_argument("--rows", type=int, default=None,
+                    help="rows of SOURCE the model saw (default: all rows currently in it)")
+    args = ap.parse_args()
+
+    m, s = load_artifacts()
+    if isinstance(m, BundledModel):
+        raise SystemExit(f"{BUNDLE_NAME} already exists")
+    rows = args.rows
+    if rows is None:
+        with open(os.path.join(BASE_DIR, args.source)) as f:
+            rows = sum(1 for _ in f) - 1           # minus the header line
+    h = write_bundle(os.path.join(BASE_DIR, BUNDLE_NAME), m, s,
+                     meta={"watermark": {"source": os.path.basename(args.source), "rows": rows}})
+    print(f"Wrote {BUNDLE_NAME} (version {h['sha256'][:12]}, watermark {rows:,} rows "
+          f"of {os.path.basename(args.source)})")
@@ -0,0 +1,144 @@
+"""
+Hot-reloadable model registry.
+
+Watches the artifact files (model.bundle, or model.pkl + scaler.pkl). When
+they change, it loads the new version on a background thread, checks it on a
+canary batch, and swaps the active (model, scaler, version) tuple in one
+assignment. Readers never see a half-loaded model, and a bad artifact leaves
+the current one serving.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from model_io import (BASE_DIR, BUNDLE_NAME, FEATURES, TREE_EVAL_MAX_ROWS, load_artifacts,
+                      model_ready, predict_proba, read_bundle_header)
+
+ARTIFACTS = (BUNDLE_NAME, "model.pkl", "scaler.pkl")
+
+# Used when diabetes.csv isn't available for the canary batch
+_FALLBACK_CANARY = np.array([
+    [6, 148, 72, 35,   0, 33.6, 0.627, 50],
+    [1,  85, 66, 29,   0, 26.6, 0.351, 31],
+    [8, 183, 64,  0,   0, 23.3, 0.672, 32],
+    [0, 137, 40, 35, 168, 43.1, 2.288, 33],
+], dtype=np.float64)
+
+
+def _canary_batch(base_dir, n=64):
+    path = os.path.join(base_dir, "diabetes.csv")
+    try:
+        return np.loadtxt(path, delimiter=",", skiprows=1, max_rows=n,
+                          usecols=range(len(FEATURES)))
+    except (OSError, ValueError):
+        return _FALLBACK_CANARY
+
+
+class ModelRegistry:
+    """Serves the current model and swaps in new artifact versions as they appear."""
+
+    def __init__(self, base_dir=BASE_DIR, poll_interval=5.0, log=print):
+        self.base_dir = base_dir
+        self.poll_interval = poll_interval
+        self.log = log
+        self.canary = _canary_batch(base_dir)
+        self.active = (None, None, None)       # (model, scaler, version) — swapped atomically
+        self.loaded_at = None
+        self.last_error = None
+        self.reloads = 0
+        self._sig = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.check()
+
+    # ---- Artifact watching ----
+    def _signature(self):
+        sig = []
+        for name in ARTIFACTS:
+            try:
+                st = os.stat(os.path.join(self.base_dir, name))
+                sig.append((name, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                pass
+        return tuple(sig)
+
+    def _version(self, model):
+        v = getattr(model, "version", None)
+        if v:
+            return v
+        h = hashlib.sha256()
+        for name in ARTIFACTS[1:]:
+            p = os.path.join(self.base_dir, name)
+            if os.path.exists(p):
+                with open(p, "rb") as f:
+                    h.update(f.read())
+        return h.hexdigest()[:12]
+
+    def _same_bundle(self):
+        """True when model.bundle's header names the version already live."""
+        version = self.active[2]
+        if version is None:
+            return False
+        try:
+            header = read_bundle_header(os.path.join(self.base_dir, BUNDLE_NAME))
+        except Exception:            # missing or unreadable: the full load reports it
+            return False
+        return header.get("sha256", "")[:12] == version
+
+    def validate(self, model, scaler):
+        """Raise if (model, scaler) can't score the canary batch sensibly."""
+        if not model_ready(model, scaler):
+            raise ValueError("artifacts incomplete")
+        p = predict_proba(model, scaler, self.canary)
+        if p.shape != (len(self.canary),) or not np.all(np.isfinite(p)) \
+                or p.min() < 0 or p.max() > 1:
+            raise ValueError("canary predictions out of range")
+        # also flattens the trees for the small-batch path before the swap
+        small = predict_proba(model, scaler, self.canary[:TREE_EVAL_MAX_ROWS])
+        if not np.allclose(small, p[:len(small)], atol=1e-5):
+            raise ValueError("small-batch evaluator disagrees with XGBoost")
+
+    def check(self):
+        """Reload if the artifact files changed. Returns True when a new version went live."""
+        sig = self._signature()
+        if sig == self._sig:
+            return False
+        if self._same_bundle():
+            self._sig = sig          # rewritten or touched, same content: keep serving it
+            return False
+        try:
+            model, scaler = load_artifacts(self.base_dir)
+            self.validate(model, scaler)
+        except Exception as e:
+            # keep serving the current version; retry once the files change again
+            self._sig = sig
+            self.last_error = f"{type(e).__name__}: {e}"
+            self.log(f"Model reload rejected: {self.last_error}")
+            return False
+        version = self._version(model)
+        self.active = (model, scaler, version)
+        self._sig = sig
+        self.loaded_at = time.time()
+        self.last_error = None
+        self.reloads += 1
+        self.log(f"Model version {version} is live")
+        return True
+
+    # ---- Background polling ----
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
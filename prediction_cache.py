@@ -0,0 +1,143 @@
+"""
+Process-wide LRU cache of single-patient predictions.
+
+The assessment form is built from discrete sliders, and users often resubmit
+the same values. Each entry is keyed on the 8-feature tuple plus the model
+version, so a hot-swapped model never serves a stale probability. Every
+Streamlit session in the process shares the one `PREDICTIONS` instance.
+
+    python prediction_cache.py --submissions 20000     # replay benchmark
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from model_io import FEATURES, predict_proba
+from risk_tiers import risk_profile
+
+DEFAULT_MAXSIZE = 4096
+
+
+def feature_key(row):
+    """Hashable key for one feature row; rounding absorbs slider float noise."""
+    return tuple(round(float(v), 4) for v in row)
+
+
+class PredictionCache:
+    """Bounded LRU of (features, model version) → (probability, risk profile)."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def score(self, model, scaler, version, row):
+        """(probability, risk profile) for one row, computed at most once per key."""
+        key = (feature_key(row), version)
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return hit[0], dict(hit[1])
+            self.misses += 1
+        prob = float(predict_proba(model, scaler, np.array([key[0]], dtype=np.float64))[0])
+        rec = risk_profile(prob, key[0][5], key[0][7])
+        with self._lock:
+            self._data[key] = (prob, rec)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return prob, dict(rec)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Scores served from the LRU vs. computed, current size and LRU evictions."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data),
+                    "evictions": self.evictions,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+PREDICTIONS = PredictionCache(int(os.getenv("GLUCOCHECK_PREDICTION_CACHE", DEFAULT_MAXSIZE)))
+
+
+# ---- Replay benchmark ----
+# Slider ranges / steps from _panel_app, in FEATURES order
+_SLIDERS = [(0, 20, 1), (50, 300, 1), (40, 180, 1), (0, 100, 1),
+            (0, 1000, 1), (10.0, 70.0, 0.1), (0.0, 2.5, 0.01), (1, 100, 1)]
+_DEFAULTS = [0, 100, 70, 20, 80, 25.0, 0.5, 30]
+
+
+def _snap(row):
+    return [round(min(max(v, lo), hi) / step) * step for v, (lo, hi, step) in zip(row, _SLIDERS)]
+
+
+def submission_log(n, seed=42, csv_path="diabetes.csv"):
+    """Synthetic but realistic form submissions.
+
+    Sessions start from a real patient row (or the untouched slider defaults),
+    resubmit it a few times, and now and then nudge one slider before resubmitting.
+    """
+    rng = np.random.default_rng(seed)
+    try:
+        base = np.loadtxt(csv_path, delimiter=",", skiprows=1, usecols=range(len(FEATURES)))
+    except OSError:
+        base = np.array([_DEFAULTS], dtype=np.float64)
+    log = []
+    while len(log) < n:
+        row = list(_DEFAULTS) if rng.random() < 0.15 else list(base[rng.integers(len(base))])
+        row = _snap(row)
+        for _ in range(1 + rng.geometric(0.35)):
+            if rng.random() < 0.3:
+                i = rng.integers(len(row))
+                lo, hi, step = _SLIDERS[i]
+                row[i] += step * rng.choice([-2, -1, 1, 2])
+                row = _snap(row)
+            log.append(list(row))
+    return log[:n]
+
+
+def benchmark(model, scaler, version, log, maxsize=DEFAULT_MAXSIZE):
+    """Replay `log` uncached and through a fresh cache; returns a timing dict."""
+    t0 = time.perf_counter()
+    for row in log:
+        p = predict_proba(model, scaler, np.array([row], dtype=np.float64))[0]
+        risk_profile(p, row[5], row[7])
+    uncached = time.perf_counter() - t0
+
+    cache = PredictionCache(maxsize)
+    t0 = time.perf_counter()
+    for row in log:
+        cache.score(model, scaler, version, row)
+    cached = time.perf_counter() - t0
+    return {"submissions": len(log), "uncached_s": uncached, "cached_s": cached,
+            "speedup": uncached / cached if cached else float("inf"), **cache.stats()}
+
+
+if __name__ == "__main__":
+    from model_registry import ModelRegistry
+
+    ap = argparse.ArgumentParser(description="Replay a submission log through the prediction cache.")
+    ap.add_argument("--submissions", type=int, default=20_000)
+    ap.add_argument("--maxsize", type=int, default=DEFAULT_MAXSIZE)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    model, scaler, version = ModelRegistry().active
+    r = benchmark(model, scaler, version, submission_log(args.submissions, args.seed), args.maxsize)
+    print(f"{r['submissions']:,} submissions · hit rate {r['hit_rate']:.1%} "
+          f"({r['evictions']:,} evictions)")
+    print(f"uncached {r['uncached_s']:.2f}s · cached {r['cached_s']:.2f}s · "
+          f"{r['speedup']:.1f}× faster")
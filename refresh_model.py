@@ -0,0 +1,136 @@
+"""
+Incremental model refresh: keep boosting the current bundle on new rows.
+
+The bundle header records a watermark — the source CSV and how many of its
+rows the model has already seen. A refresh reads only the rows past the
+watermark, warm-starts the bundled booster on them (`xgb_model=`), and
+promotes the result only if its AUC on a hashed holdout of the new rows is
+within `tolerance` of the current model's. The previous bundle is kept as
+`<bundle>.prev` for rollback, and feature_importance.json is rewritten for
+the promoted model.
+
+A bundle without a watermark can't say which rows it was trained on, so it
+is only refreshed when `--since-row` gives the number of rows it has seen.
+
+    python refresh_model.py diabetes.csv --rounds 20
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+
+from model_io import (BUNDLE_NAME, FEATURES, IMPORTANCE_NAME, load_bundle, write_bundle,
+                      write_feature_importance)
+from streaming_train import TARGET, holdout_mask
+
+MIN_HOLDOUT = 30
+REFRESH_PARAMS = {"learning_rate": 0.05, "max_depth": 3, "subsample": 0.8}
+
+
+def _train_params(meta):
+    """Params for the new trees: the bundle's recorded training params
+    (XGBoost doesn't persist them in the model), else conservative defaults."""
+    return {"objective": "binary:logistic", "tree_method": "hist", "seed": 42,
+            **REFRESH_PARAMS, **(meta.get("train_params") or {})}
+
+
+def new_rows(source, watermark_rows):
+    """Rows of `source` past the watermark, plus their global row numbers."""
+    df = pd.read_csv(source, usecols=FEATURES + [TARGET],
+                     skiprows=range(1, watermark_rows + 1))
+    return df, np.arange(watermark_rows, watermark_rows + len(df))
+
+
+def refresh(source, bundle_path=BUNDLE_NAME, rounds=20, test_size=0.2,
+            tolerance=0.005, dry_run=False, since_row=None, log=print):
+    """Warm-start the bundled booster on rows appended to `source`.
+
+    `since_row` sets the watermark of a bundle that has none (rows of `source`
+    it was already trained on). Returns a summary dict; `promoted` says
+    whether the bundle was replaced.
+    """
+    t0 = time.perf_counter()
+    model = load_bundle(bundle_path)
+    meta = dict(model.header.get("meta") or {})
+    mark = meta.get("watermark")
+    if mark is None:
+        if since_row is None:
+            raise ValueError(f"{bundle_path} has no watermark; pass since_row (--since-row) "
+                             f"with the number of {source!r} rows it was trained on")
+        mark = {"source": os.path.basename(source), "rows": int(since_row)}
+    if mark["source"] != os.path.basename(source):
+        raise ValueError(f"Bundle watermark is for {mark['source']!r}, not {source!r}")
+
+    df, ids = new_rows(source, mark["rows"])
+    summary = {"rows_added": len(df), "watermark": mark["rows"], "promoted": False}
+    if df.empty:
+        log("No new rows since the last refresh.")
+        return summary
+
+    X = df[FEATURES].to_numpy(dtype=np.float32)
+    y = df[TARGET].to_numpy(dtype=np.float32)
+    hold = holdout_mask(ids, test_size)
+    if hold.sum() < MIN_HOLDOUT or len(np.unique(y[hold])) < 2 or (~hold).sum() == 0:
+        log(f"Only {hold.sum()} holdout rows / one class — waiting for more data.")
+        return summary
+
+    booster = model.booster
+    best = model.header.get("best_iteration")
+    if best is not None:
+        booster = booster[: int(best) + 1]
+    updated = xgb.train(_train_params(meta), xgb.DMatrix(X[~hold], label=y[~hold]),
+                        num_boost_round=rounds, xgb_model=booster)
+
+    dh = xgb.DMatrix(X[hold])
+    auc_old = roc_auc_score(y[hold], booster.predict(dh))
+    auc_new = roc_auc_score(y[hold], updated.predict(dh))
+    summary.update(auc_old=auc_old, auc_new=auc_new, seconds=time.perf_counter() - t0)
+    log(f"{len(df):,} new rows · holdout AUC {auc_old:.4f} → {auc_new:.4f} "
+        f"({summary['seconds']:.1f}s)")
+
+    if auc_new < auc_old - tolerance:
+        log("Refresh rejected by the holdout AUC guard; current bundle kept.")
+        return summary
+    if dry_run:
+        return summary
+
+    mark = {"source": mark["source"], "rows": mark["rows"] + len(df)}
+    history = list(meta.get("refreshes", []))[-19:] + [{
+        "at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "rows_added": len(df), "auc_old": auc_old, "auc_new": auc_new}]
+    shutil.copyfile(bundle_path, bundle_path + ".prev")
+    header = write_bundle(bundle_path, updated, model.header["scaler"], model.features,
+                          meta={**meta, "watermark": mark, "refreshes": history},
+                          prefolded=True)
+    write_feature_importance(os.path.join(os.path.dirname(os.path.abspath(bundle_path)),
+                                          IMPORTANCE_NAME), updated)
+    summary.update(promoted=True, version=header["sha256"][:12], watermark=mark["rows"])
+    log(f"Promoted {bundle_path} version {summary['version']} (watermark {mark['rows']:,} rows)")
+    return summary
+
+
+# ---- Main ----
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Incrementally refresh the model bundle.")
+    ap.add_argument("source", help="labelled CSV that new rows are appended to")
+    ap.add_argument("--bundle", default=BUNDLE_NAME)
+    ap.add_argument("--rounds", type=int, default=20, help="boosting rounds to add")
+    ap.add_argument("--test-size", type=float, default=0.2)
+    ap.add_argument("--tolerance", type=float, default=0.005,
+                    help="max holdout AUC drop still promoted")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--since-row", type=int, default=None,
+                    help="rows of SOURCE the bundle already saw (only for bundles without a watermark)")
+    args = ap.parse_args()
+    try:
+        refresh(args.source, args.bundle, args.rounds, args.test_size, args.tolerance,
+                args.dry_run, args.since_row)
+    except ValueError as e:
+        raise SystemExit(str(e))
@@ -0,0 +1,136 @@
+"""
+PDF health reports — the app's download and clinic batch export.
+
+`report_pdf` renders one patient's report and caches the bytes by input
+tuple (and date), so the app only builds a PDF when one is requested and
+never builds the same one twice. ReportLab is imported on the first render,
+not when the app starts. `export_zip` renders a whole day of
+assessments on a process pool and streams them into a single zip.
+
+    python reports.py assessments.csv -o reports.zip --workers 4 --id-col PatientID
+"""
+
+import argparse
+import datetime
+import functools
+import multiprocessing as mp
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from risk_tiers import risk_profile
+
+TITLE = "GlucoCheck Pro+ — Health Report"
+DISCLAIMER = ("Disclaimer: This is a risk assessment tool only. "
+              "Always consult a qualified healthcare professional.")
+REPORT_CACHE_SIZE = 256
+
+
+# ---- Rendering ----
+def render_report(prob, rec, age, bmi, glucose, bp, skin, insulin, ped, preg,
+                  generated=None, patient=None):
+    """One-page PDF report as bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    w, h = letter
+    c.setFont("Helvetica-Bold",20); c.setFillColorRGB(.42,.39,1.)
+    c.drawString(50,h-50,TITLE)
+    c.setFont("Helvetica",10); c.setFillColorRGB(.55,.55,.55)
+    sub = f"Generated: {generated or datetime.date.today()}"
+    c.drawString(50,h-66,f"{sub}   ·   Patient: {patient}" if patient else sub)
+    y = h-105; c.setFont("Helvetica-Bold",12); c.setFillColorRGB(0,0,0)
+    c.drawString(50,y,"Patient Metrics")
+    c.setFont("Helvetica",10)
+    for ln in [f"Age: {age} yrs | BMI: {bmi:.1f} ({rec['bmi_cat']}) | Glucose: {glucose} mg/dL",
+               f"Blood Pressure: {bp} mmHg | Skin Thickness: {skin} mm | Insulin: {insulin} μU/mL",
+               f"Diabetes Pedigree: {ped:.3f} | Pregnancies: {preg}"]:
+        y -= 15; c.drawString(60,y,ln)
+    y -= 25; c.setFont("Helvetica-Bold",12); c.drawString(50,y,"Risk Assessment")
+    c.setFont("Helvetica",10); y-=15
+    c.drawString(60,y,f"Probability: {prob*100:.1f}%   Risk Level: {rec['risk']}")
+    for section, items in [("Diet",rec["diet"]),("Exercise",rec["exercise"]),("Supplements",rec["supplements"])]:
+        y -= 22; c.setFont("Helvetica-Bold",11); c.drawString(50,y,f"{section}:")
+        c.setFont("Helvetica",10)
+        for item in items: y-=13; c.drawString(62,y,f"• {item}")
+    c.setFont("Helvetica-Oblique",8); c.setFillColorRGB(.5,.5,.5)
+    c.drawString(50,42,DISCLAIMER)
+    c.showPage(); c.save()
+    return buf.getvalue()
+
+
+@functools.lru_cache(maxsize=REPORT_CACHE_SIZE)
+def _cached_report(prob, age, bmi, glucose, bp, skin, insulin, ped, preg, generated):
+    rec = risk_profile(prob, bmi, age)
+    return render_report(prob, rec, age, bmi, glucose, bp, skin, insulin, ped, preg, generated)
+
+
+def report_pdf(prob, age, bmi, glucose, bp, skin, insulin, ped, preg):
+    """Cached report bytes for one assessment; rebuilt at most once per input per day."""
+    return _cached_report(float(prob), age, bmi, glucose, bp, skin, insulin, ped, preg,
+                          datetime.date.today())
+
+
+# ---- Batch export ----
+def _render_row(args):
+    name, prob, age, bmi, glucose, bp, skin, insulin, ped, preg, patient = args
+    rec = risk_profile(prob, bmi, age)
+    return name, render_report(prob, rec, age, bmi, glucose, bp, skin, insulin, ped, preg,
+                               patient=patient)
+
+
+def _jobs(scored, id_col, start):
+    for i, r in enumerate(scored.itertuples(index=False)):
+        d = r._asdict()
+        pid = d.get(id_col) if id_col else None
+        name = f"{pid if pid is not None else f'patient_{start + i + 1:06d}'}_{d['risk']}.pdf"
+        yield (name.replace("/", "_").replace(" ", "_"), float(d["probability"]),
+               int(d["Age"]), float(d["BMI"]), d["Glucose"], d["BloodPressure"],
+               d["SkinThickness"], d["Insulin"], float(d["DiabetesPedigreeFunction"]),
+               int(d["Pregnancies"]), pid)
+
+
+def export_zip(src, dst, workers=None, chunksize=10_000, id_col=None,
+               model=None, scaler=None, log=print):
+    """Score `src` and write one PDF per row into the zip `dst`. Returns (reports, seconds)."""
+    from batch_score import iter_chunks, score_chunk
+    from model_io import load_artifacts, model_ready
+
+    if model is None:
+        model, scaler = load_artifacts()
+    if not model_ready(model, scaler):
+        raise FileNotFoundError("model.bundle or model.pkl + scaler.pkl not found")
+
+    n, t0 = 0, time.perf_counter()
+    tmp = dst + ".tmp"
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool, \
+            zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        for chunk in iter_chunks(src, chunksize):
+            scored = score_chunk(chunk, model, scaler)
+            # results arrive in order and go straight into the archive
+            for name, pdf in pool.map(_render_row, _jobs(scored, id_col, n), chunksize=32):
+                zf.writestr(name, pdf)
+                n += 1
+            log(f"{n:,} reports · {n / (time.perf_counter() - t0):,.0f} reports/sec")
+    os.replace(tmp, dst)
+    return n, time.perf_counter() - t0
+
+
+# ---- Main ----
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Render PDF reports for a batch of assessments.")
+    ap.add_argument("input", help="CSV or Parquet file with the 8 model features")
+    ap.add_argument("-o", "--output", help="zip to write (default: <input>_reports.zip)")
+    ap.add_argument("--workers", type=int, default=None, help="render processes (default: all CPUs)")
+    ap.add_argument("--id-col", default=None, help="column used to name each patient's PDF")
+    ap.add_argument("--chunksize", type=int, default=10_000, help="rows scored per chunk")
+    args = ap.parse_args()
+
+    dst = args.output or f"{os.path.splitext(args.input)[0]}_reports.zip"
+    n, secs = export_zip(args.input, dst, args.workers, args.chunksize, args.id_col,
+                         log=lambda m: print(m, file=sys.stderr))
+    print(f"Wrote {n:,} reports in {secs:.1f}s → {dst}")
@@ -0,0 +1,78 @@
+"""
+Risk tiering shared by the Streamlit app and the headless scoring tools.
+
+The tier / BMI-category / age-group tables are built once at import.
+`classify` maps whole NumPy arrays to compact integer codes; `risk_profile`
+resolves a single patient to the recommendation dict the app renders.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+RISK_COLORS = {"Very Low":"#3fb950","Low":"#8BC34A","Moderate":"#d29922",
+               "High":"#FF9800","Very High":"#f85149"}
+
+# (upper probability bound, risk, colour, icon, diet, exercise, supplements)
+_TIERS = [
+    (.2, "Very Low","#3fb950","😊",
+     ["Balanced whole-food diet.","Limit processed sugars.","Stay hydrated."],
+     ["30-min brisk walk 5×/week.","Strength training 2-3×/week."],
+     ["Multivitamin.","Omega-3 fatty acids."]),
+    (.4,"Low","#8BC34A","🙂",
+     ["Focus on portion control.","Increase fibre intake.","Cut sugary drinks."],
+     ["150 min moderate exercise/week.","Cycling or swimming."],
+     ["Vitamin D."]),
+    (.6,"Moderate","#d29922","😐",
+     ["Limit refined carbs.","Lean protein + healthy fats.","See a nutritionist."],
+     ["200–250 min moderate/week.","Cardio + strength training."],
+     ["Chromium picolinate.","Magnesium."]),
+    (.8,"High","#FF9800","😟",
+     ["Low-GI diet.","Eliminate sugary snacks.","Work with a dietitian."],
+     ["250–300 min moderate/week.","Monitor blood sugar pre/post exercise."],
+     ["Berberine (doctor approval).","Alpha-lipoic acid."]),
+    (2.,"Very High","#f85149","❗",
+     ["Medical nutrition therapy.","Zero processed food.","Regular BGL monitoring."],
+     ["Daily activity even short walks.","Supervised exercise programme."],
+     ["Supplements only under supervision.","CoQ10."]),
+]
+
+TIER_EDGES  = np.array([t[0] for t in _TIERS[:-1]])   # .2 .4 .6 .8
+TIER_NAMES  = [t[1] for t in _TIERS]
+TIERS = tuple(dict(risk=rl,color=col,icon=ic,diet=di,exercise=ex,supplements=su)
+              for _,rl,col,ic,di,ex,su in _TIERS)
+
+BMI_EDGES = np.array([18.5, 25., 30.])
+BMI_CATS  = ["Underweight", "Normal", "Overweight", "Obese"]
+
+AGE_GROUPS = ["Child/Teen", "Adult", "Senior"]   # <18, 18–60, >60
+
+_TIER_EDGES_L = TIER_EDGES.tolist()
+_BMI_EDGES_L  = BMI_EDGES.tolist()
+
+
+def classify(prob, bmi, age):
+    """Vectorised tiering → (tier, bmi_cat, age_grp) int8 code arrays."""
+    prob = np.asarray(prob, dtype=np.float64)
+    bmi  = np.asarray(bmi,  dtype=np.float64)
+    age  = np.asarray(age,  dtype=np.float64)
+    tier = np.searchsorted(TIER_EDGES, prob, side="right").astype(np.int8)
+    bmc  = np.digitize(bmi, BMI_EDGES).astype(np.int8)
+    ag   = ((age >= 18).astype(np.int8) + (age > 60)).astype(np.int8)
+    return tier, bmc, ag
+
+
+def profile_from_codes(tier, bmc, ag):
+    """Resolve one (tier, bmi_cat, age_grp) code triple to the recommendation dict."""
+    t = TIERS[int(tier)]
+    return dict(risk=t["risk"], color=t["color"], icon=t["icon"],
+                diet=list(t["diet"]), exercise=list(t["exercise"]),
+                supplements=list(t["supplements"]),
+                bmi_cat=BMI_CATS[int(bmc)], age_grp=AGE_GROUPS[int(ag)])
+
+
+def risk_profile(prob, bmi, age):
+    """Map a probability plus BMI/age to the tier + recommendation dict."""
+    ag = 0 if age < 18 else (2 if age > 60 else 1)
+    return profile_from_codes(bisect_right(_TIER_EDGES_L, prob),
+                              bisect_right(_BMI_EDGES_L, bmi), ag)
@@ -0,0 +1,330 @@
+"""
+Local HTTP scoring service with micro-batching (stdlib only).
+
+Concurrent single-patient requests are queued and collected into
+micro-batches (up to `max_batch` rows, or whatever arrived within
+`max_wait_ms`), then scored with one predict_proba call. An `instances`
+request is already a batch and is scored as one block on its own thread. Artifacts come from the same ModelRegistry the app
+uses, so new model versions are picked up without a restart.
+
+    python scoring_service.py --port 8600 --max-batch 64 --max-wait-ms 5
+
+    POST /score    {"Glucose": 148, "BMI": 33.6, ...}            one patient
+                   {"instances": [{...}, {...}]}                 several
+                   {"instances": [[...], ...], "profile": false} probabilities only
+    GET  /metrics  latency histogram, recent throughput, batch sizes
+    GET  /healthz  active model version
+
+The Streamlit app calls it when GLUCOCHECK_SCORING_URL is set, through a
+RemoteScorer: after a failed call the client fails fast for `cooldown`
+seconds instead of waiting out the timeout on every rerun.
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from model_io import FEATURES, predict_proba
+from model_registry import ModelRegistry
+from risk_tiers import classify, profile_from_codes
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+THROUGHPUT_WINDOW_S = 60
+
+
+# ---- Metrics ----
+class Metrics:
+    """Single-patient latency histogram, recent throughput and batch-size counters."""
+
+    def __init__(self, window_s=THROUGHPUT_WINDOW_S):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.window_s = window_s
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.requests = self.rows = self.batches = self.errors = self.bulk_requests = 0
+        self.recent = deque()          # [second, requests, rows] for each second in the window
+
+    def _trim(self, now):
+        while self.recent and self.recent[0][0] <= now - self.window_s:
+            self.recent.popleft()
+
+    def observe(self, ms, rows=1, bulk=False):
+        now = int(time.monotonic())
+        with self.lock:
+            if bulk:       # a whole block: its latency would skew the per-patient histogram
+                self.bulk_requests += 1
+            else:
+                self.counts[next(i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b)] += 1
+            self.requests += 1
+            self.rows += rows
+            if self.recent and self.recent[-1][0] == now:
+                self.recent[-1][1] += 1
+                self.recent[-1][2] += rows
+            else:
+                self.recent.append([now, 1, rows])
+                self._trim(now)
+
+    def snapshot(self):
+        with self.lock:
+            up = time.time() - self.started
+            n = sum(self.counts)
+            self._trim(int(time.monotonic()))
+            span = max(1.0, min(self.window_s, up))
+
+            def pct(q):
+                acc = 0
+                for b, c in zip(LATENCY_BUCKETS_MS, self.counts):
+                    acc += c
+                    if n and acc >= q * n:
+                        return b
+                return None
+
+            return {
+                "uptime_s": round(up, 1), "requests": self.requests, "rows": self.rows,
+                "errors": self.errors, "batches": self.batches,
+                "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else 0,
+                "bulk_requests": self.bulk_requests,
+                "window_s": round(span, 1),
+                "requests_per_s": round(sum(b[1] for b in self.recent) / span, 2),
+                "rows_per_s": round(sum(b[2] for b in self.recent) / span, 2),
+                "measures": {"requests/rows/errors/batches": "totals since start",
+                             "requests_per_s/rows_per_s": f"over the last {self.window_s}s",
+                             "latency_ms": "single-patient requests only, since start"},
+                "latency_ms": {"buckets": [str(b) for b in LATENCY_BUCKETS_MS],
+                               "counts": list(self.counts),
+                               "p50_le": pct(.5), "p95_le": pct(.95), "p99_le": pct(.99)},
+            }
+
+
+# ---- Micro-batching ----
+class MicroBatcher:
+    """Collects single-row requests into batches scored with one model call."""
+
+    def __init__(self, registry, metrics, max_batch=64, max_wait_ms=5.0):
+        self.registry, self.metrics = registry, metrics
+        self.max_batch, self.max_wait = max_batch, max_wait_ms / 1000
+        self.q = queue.Queue()
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def submit(self, row):
+        fut = Future()
+        self.q.put((row, fut))
+        return fut
+
+    def _loop(self):
+        while True:
+            batch = [self.q.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(self.q.get(timeout=left))
+                except queue.Empty:
+                    break
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            results = score_block(self.registry, self.metrics, [r for r, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results):
+            fut.set_result(res)
+
+
+def score_block(registry, metrics, rows, profile=True):
+    """Result dicts for `rows` (8 features each), scored with one model call.
+
+    `profile=False` leaves out the risk tier and recommendations.
+    """
+    model, scaler, version = registry.active
+    try:
+        X = np.array(rows, dtype=np.float64)
+        prob = predict_proba(model, scaler, X)
+        tier, bmc, ag = classify(prob, X[:, 5], X[:, 7])
+    except Exception:
+        with metrics.lock:
+            metrics.errors += 1
+        raise
+    with metrics.lock:
+        metrics.batches += 1
+    if not profile:
+        return [{"probability": p, "model_version": version} for p in prob.tolist()]
+    return [{"probability": float(prob[i]), "model_version": version,
+             **profile_from_codes(tier[i], bmc[i], ag[i])} for i in range(len(rows))]
+
+
+def _row(obj):
+    """Feature dict (or 8-value list) → ordered list of floats."""
+    if isinstance(obj, dict):
+        missing = [f for f in FEATURES if f not in obj]
+        if missing:
+            raise ValueError(f"missing features: {missing}")
+        return [float(obj[f]) for f in FEATURES]
+    if isinstance(obj, (list, tuple)) and len(obj) == len(FEATURES):
+        return [float(v) for v in obj]
+    raise ValueError(f"expected an object with {FEATURES} or a list of {len(FEATURES)} values")
+
+
+def _rows(instances):
+    """`instances` → (n, 8) float array; all-list bodies skip the per-row parse."""
+    if instances and all(isinstance(r, list) for r in instances):
+        X = np.asarray(instances, dtype=np.float64)
+        if X.ndim == 2 and X.shape[1] == len(FEATURES):
+            return X
+    return np.array([_row(r) for r in instances], dtype=np.float64).reshape(-1, len(FEATURES))
+
+
+# ---- HTTP ----
+def make_handler(batcher, metrics, registry, timeout=5.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, metrics.snapshot())
+            elif self.path == "/healthz":
+                self._send(200, {"ok": registry.active[0] is not None,
+                                 "model_version": registry.active[2]})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                return self._send(404, {"error": "not found"})
+            t0 = time.perf_counter()
+            try:
+                n = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(n) or b"{}")
+                many = isinstance(body, dict) and "instances" in body
+                rows = _rows(body["instances"]) if many else [_row(body)]
+            except (ValueError, TypeError, KeyError) as e:
+                return self._send(400, {"error": str(e)})
+            try:
+                if many:       # already a batch: one model call, no queueing per row
+                    results = (score_block(registry, metrics, rows, body.get("profile", True))
+                               if len(rows) else [])
+                else:
+                    results = [batcher.submit(rows[0]).result(timeout)]
+            except Exception as e:
+                return self._send(503, {"error": str(e)})
+            metrics.observe((time.perf_counter() - t0) * 1000, len(rows), bulk=many)
+            self._send(200, {"predictions": results} if many else results[0])
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256   # the default backlog of 5 resets connections under bursts
+
+
+def serve(host="127.0.0.1", port=8600, max_batch=64, max_wait_ms=5.0):
+    registry = ModelRegistry().start()
+    metrics = Metrics()
+    batcher = MicroBatcher(registry, metrics, max_batch, max_wait_ms)
+    httpd = _Server((host, port), make_handler(batcher, metrics, registry))
+    print(f"Scoring service on http://{host}:{port} (model {registry.active[2]}, "
+          f"max_batch={max_batch}, max_wait={max_wait_ms}ms)")
+    return httpd
+
+
+# ---- Client ----
+def _post_score(url, payload, timeout):
+    req = urllib.request.Request(
+        url.rstrip("/") + "/score", data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def remote_score(url, features, timeout=2.0):
+    """Score one patient via the service. `features` is the 8 values in FEATURES order."""
+    return _post_score(url, dict(zip(FEATURES, features)), timeout)
+
+
+class RemoteScorer:
+    """Service client with a circuit breaker.
+
+    A failed call opens the circuit: for `cooldown` seconds every call raises
+    ConnectionError at once. The first call after that is a probe (others
+    keep failing fast while it runs); success closes the circuit again.
+    """
+
+    def __init__(self, url, timeout=2.0, cooldown=30.0, bulk_timeout=10.0):
+        self.url, self.timeout, self.cooldown = url, timeout, cooldown
+        self.bulk_timeout = bulk_timeout
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.open_until
+
+    def _call(self, payload, timeout):
+        with self._lock:
+            now = time.monotonic()
+            if now < self.open_until:
+                raise ConnectionError(f"scoring service unavailable for another "
+                                      f"{self.open_until - now:.0f}s")
+            if self.failures:
+                self.open_until = now + self.cooldown      # claim the probe
+        try:
+            res = _post_score(self.url, payload, timeout)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                self.open_until = time.monotonic() + self.cooldown
+            raise
+        with self._lock:
+            self.failures, self.open_until = 0, 0.0
+        return res
+
+    def score(self, features):
+        """Result dict for one patient (probability, model_version, risk profile)."""
+        return self._call(dict(zip(FEATURES, features)), self.timeout)
+
+    def probabilities(self, X):
+        """Probabilities for every row of the (n, 8) feature matrix X, in one request
+        that the service scores with one model call."""
+        res = self._call({"instances": np.asarray(X, dtype=np.float64).tolist(), "profile": False},
+                         self.bulk_timeout)
+        return np.array([r["probability"] for r in res["predictions"]])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Micro-batching HTTP scoring service.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = ap.parse_args()
+    httpd = serve(args.host, args.port, args.max_batch, args.max_wait_ms)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,32 @@
+"""
+Shared SQLite connection handling for the app's stores (users, history, chat cache).
+
+Each thread gets its own connection per database file, opened on first use
+with WAL journaling (readers don't block the writer) and synchronous=NORMAL
+(fsync at checkpoints, not on every commit).
+"""
+
+import os
+import sqlite3
+import threading
+
+_LOCAL = threading.local()
+
+
+def sqlite_conn(path, init=None):
+    """This thread's connection to `path`; `init(conn)` runs once when it is opened
+    (schema creation, migrations)."""
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    key = os.path.abspath(path)
+    conn = conns.get(key)
+    if conn is None:
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if init is not None:
+            init(conn)
+        conns[key] = conn
+    return conn
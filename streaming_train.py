@@ -0,0 +1,149 @@
+"""
+Out-of-core training for cohorts that don't fit in memory.
+
+The small-file path in advanced_diabetes_predictor.py is unchanged; this
+module streams the CSV in chunks instead:
+
+1. split train/holdout by hashing a row id, so a row always lands on the
+   same side across passes and reruns. The hash ignores the label: the
+   split is random with respect to outcome, not stratified, and on small
+   cohorts the holdout's class balance can drift from the training side's;
+2. fit StandardScaler incrementally with `partial_fit` over the training
+   side of every chunk (holdout rows never inform the scaling);
+3. feed XGBoost through an external-memory `DataIter`, so only one chunk of
+   raw rows is resident at a time.
+
+    python streaming_train.py cohort.csv --chunksize 200000 --rounds 200
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from model_io import BUNDLE_NAME, FEATURES, write_bundle
+
+TARGET = "Outcome"
+DEFAULT_PARAMS = {"objective": "binary:logistic", "eval_metric": "auc",
+                  "tree_method": "hist", "max_depth": 3, "learning_rate": 0.1,
+                  "subsample": 0.7, "seed": 42}
+
+
+# ---- Chunked input ----
+def _chunks(path, chunksize, id_col=None):
+    """Yield (X, y, row_ids) per chunk; row ids default to the global row number."""
+    cols = FEATURES + [TARGET] + ([id_col] if id_col else [])
+    start = 0
+    for df in pd.read_csv(path, usecols=cols, chunksize=chunksize):
+        ids = df[id_col].to_numpy() if id_col else np.arange(start, start + len(df))
+        start += len(df)
+        yield (df[FEATURES].to_numpy(dtype=np.float64),
+               df[TARGET].to_numpy(dtype=np.float32), ids)
+
+
+def holdout_mask(ids, test_size, seed=42):
+    """True for rows in the holdout; a pure function of (row id, seed)."""
+    h = pd.util.hash_array(np.asarray(ids), hash_key=f"{seed:016d}"[:16])
+    return (h >> np.uint64(11)).astype(np.float64) / float(1 << 53) < test_size
+
+
+def fit_scaler(path, chunksize, id_col=None, test_size=0.0, seed=42):
+    """Pass 1: StandardScaler.partial_fit over the training side of every chunk.
+    Returns (scaler, rows), `rows` counting every row read, holdout included."""
+    scaler, rows = StandardScaler(), 0
+    for X, _, ids in _chunks(path, chunksize, id_col):
+        train = ~holdout_mask(ids, test_size, seed)
+        if train.any():
+            scaler.partial_fit(X[train])
+        rows += len(X)
+    return scaler, rows
+
+
+class CohortIter(xgb.DataIter):
+    """External-memory iterator over one side (train or holdout) of the split."""
+
+    def __init__(self, path, chunksize, scaler, test_size, holdout, id_col=None,
+                 seed=42, cache_prefix=None):
+        self.path, self.chunksize, self.scaler = path, chunksize, scaler
+        self.test_size, self.holdout, self.id_col, self.seed = test_size, holdout, id_col, seed
+        self._it = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._it = None
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = _chunks(self.path, self.chunksize, self.id_col)
+        for X, y, ids in self._it:
+            keep = holdout_mask(ids, self.test_size, self.seed) == self.holdout
+            if keep.any():
+                input_data(data=self.scaler.transform(X[keep]), label=y[keep])
+                return True
+        return False
+
+
+# ---- Training ----
+def train_streaming(path, chunksize=100_000, rounds=200, test_size=0.2, id_col=None,
+                    params=None, seed=42, log=print):
+    """Train on a CSV too large for memory.
+
+    Returns (booster, scaler, holdout_auc, rows), `rows` being every row read.
+    """
+    t0 = time.perf_counter()
+    scaler, rows = fit_scaler(path, chunksize, id_col, test_size, seed)
+    log(f"Scaler fitted on the training side of {rows:,} rows ({time.perf_counter() - t0:.1f}s)")
+
+    cache = tempfile.mkdtemp(prefix="gc_xgb_cache_")
+    try:
+        it = CohortIter(path, chunksize, scaler, test_size, False, id_col, seed,
+                        cache_prefix=os.path.join(cache, "train"))
+        dtrain = xgb.DMatrix(it)
+        booster = xgb.train({**DEFAULT_PARAMS, **(params or {})}, dtrain, num_boost_round=rounds)
+        log(f"Trained {rounds} rounds on {dtrain.num_row():,} rows "
+            f"({time.perf_counter() - t0:.1f}s)")
+    finally:
+        # release the cache pages before deleting them
+        dtrain = it = None
+        shutil.rmtree(cache, ignore_errors=True)
+
+    # Holdout AUC, predicted chunk by chunk
+    ys, ps = [], []
+    for X, y, ids in _chunks(path, chunksize, id_col):
+        m = holdout_mask(ids, test_size, seed)
+        if m.any():
+            ps.append(booster.inplace_predict(scaler.transform(X[m])))
+            ys.append(y[m])
+    auc = roc_auc_score(np.concatenate(ys), np.concatenate(ps)) if ys else float("nan")
+    log(f"Holdout AUC {auc:.4f} on {sum(len(y) for y in ys):,} rows")
+    return booster, scaler, auc, rows
+
+
+# ---- Main ----
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Out-of-core training on a large CSV cohort.")
+    ap.add_argument("input", help="CSV with the 8 model features + Outcome")
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--rounds", type=int, default=200)
+    ap.add_argument("--test-size", type=float, default=0.2)
+    ap.add_argument("--id-col", default=None, help="stable row id column to hash for the split")
+    ap.add_argument("--max-depth", type=int, default=DEFAULT_PARAMS["max_depth"])
+    ap.add_argument("--learning-rate", type=float, default=DEFAULT_PARAMS["learning_rate"])
+    ap.add_argument("-o", "--output", default=BUNDLE_NAME, help="model bundle to write")
+    args = ap.parse_args()
+
+    params = {"max_depth": args.max_depth, "learning_rate": args.learning_rate}
+    booster, scaler, auc, rows = train_streaming(
+        args.input, args.chunksize, args.rounds, args.test_size, args.id_col, params=params)
+    header = write_bundle(args.output, booster, scaler,
+                          meta={"holdout_auc": auc,
+                                "watermark": {"source": os.path.basename(args.input), "rows": rows},
+                                "train_params": {**params, "subsample": DEFAULT_PARAMS["subsample"]}})
+    print(f"Saved {args.output} (version {header['sha256'][:12]})")
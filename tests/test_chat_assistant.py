@@ -0,0 +1,95 @@
+"""ChatAssistant streaming against fake_openai_server on an ephemeral port."""
+
+import json
+import threading
+import time
+import urllib.request
+
+import pytest
+
+pytest.importorskip("openai")
+
+import fake_openai_server
+from chat_assistant import ChatAssistant, ChatStream, _DONE
+
+
+@pytest.fixture
+def fake_server():
+    """Start a fake server with the given knobs; yields its base URL and a request counter."""
+    servers = []
+
+    def start(**kw):
+        httpd = fake_openai_server.serve(port=0, **kw)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+
+        def requests():
+            with urllib.request.urlopen(url + "/stats") as resp:
+                return json.loads(resp.read())["requests"]
+        return url, requests
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_stream_delivers_the_whole_reply(fake_server):
+    url, requests = fake_server(token_ms=1)
+    s = ChatAssistant(api_key="fake", base_url=url).stream("What foods lower blood sugar?")
+    chunks = list(s)
+    assert len(chunks) > 10
+    assert s.result() == "".join(chunks).strip()
+    assert s.result().endswith("before changing your treatment.")
+    assert s.error is None and requests() == 1
+
+
+def test_stream_retries_before_the_first_token(fake_server):
+    # the client retries once itself; the third request is ChatAssistant's own retry
+    url, requests = fake_server(token_ms=1, fail_first=2)
+    s = ChatAssistant(api_key="fake", base_url=url, max_retries=1).stream("Is fruit OK?")
+    reply = s.result()
+    assert s.error is None
+    assert reply.startswith("Good question") and "…(" not in reply
+    assert requests() == 3
+
+
+def test_stream_marks_a_reply_cut_off_after_tokens_started(fake_server):
+    url, requests = fake_server(token_ms=1, stall_after=3)
+    s = ChatAssistant(api_key="fake", base_url=url, timeout=0.5, max_retries=0).stream("Q?")
+    t0 = time.perf_counter()
+    reply = s.result()
+    assert time.perf_counter() - t0 < 5
+    assert reply.startswith("Good question")
+    assert reply.endswith("…(connection lost)")
+    assert s.error and requests() == 1       # no retry once tokens were shown
+
+
+def test_stream_times_out_waiting_for_the_producer():
+    s = ChatStream(timeout=0.2)
+    s._put("Partial")
+    t0 = time.perf_counter()
+    assert s.result() == "Partial …(timed out)"
+    assert s.error == "timed out waiting for the reply"
+    assert s.cancelled.is_set()
+    assert time.perf_counter() - t0 < 1
+    s._put("late")
+    assert list(s) == []                     # a finished stream isn't read again
+
+
+def test_result_after_iterating_does_not_wait_again():
+    s = ChatStream(timeout=5)
+    s._put("Hello")
+    s._put(_DONE)
+    assert list(s) == ["Hello"]
+    t0 = time.perf_counter()
+    assert s.result() == "Hello"
+    assert time.perf_counter() - t0 < 1
+
+
+def test_ask_returns_the_whole_reply(fake_server):
+    url, requests = fake_server(token_ms=0)
+    reply = ChatAssistant(api_key="fake", base_url=url).ask("Can I eat rice?")
+    assert reply.startswith("Good question about 'Can I eat rice?'")
+    assert requests() == 1
@@ -0,0 +1,80 @@
+"""Model bundle round trip and the registry's reload checks."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+from sklearn.preprocessing import StandardScaler
+
+import model_io
+from model_io import (BUNDLE_NAME, FEATURES, load_bundle, predict_proba, read_bundle_header,
+                      write_bundle)
+from model_registry import ModelRegistry
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "diabetes.csv")
+
+
+@pytest.fixture(scope="module")
+def trained():
+    df = pd.read_csv(DATA)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=3)
+    model.fit(scaler.transform(X), df["Outcome"])
+    return model, scaler, X
+
+
+def test_bundle_round_trip(trained, tmp_path):
+    model, scaler, X = trained
+    path = str(tmp_path / BUNDLE_NAME)
+    header = write_bundle(path, model, scaler)
+    assert read_bundle_header(path)["sha256"] == header["sha256"]
+    bundled = load_bundle(path)
+    assert bundled.version == header["sha256"][:12]
+    ref = model.predict_proba(scaler.transform(X))[:, 1]
+    assert np.abs(predict_proba(bundled, None, X) - ref).max() < 1e-5
+
+
+def test_public_load_path_matches(trained, tmp_path, monkeypatch):
+    model, scaler, X = trained
+    path = str(tmp_path / BUNDLE_NAME)
+    write_bundle(path, model, scaler)
+    fast = load_bundle(path)
+    monkeypatch.setattr(model_io, "_load_booster_from",
+                        lambda booster, buf: booster.load_model(bytearray(buf)))
+    public = load_bundle(path)
+    assert np.array_equal(fast.predict_proba(X), public.predict_proba(X))
+
+
+def test_corrupted_bundle_is_rejected(trained, tmp_path):
+    model, scaler, _ = trained
+    path = str(tmp_path / BUNDLE_NAME)
+    header = write_bundle(path, model, scaler)
+    with open(path, "r+b") as f:
+        f.seek(header["booster"]["offset"] + 10)
+        b = f.read(1)
+        f.seek(-1, 1)
+        f.write(bytes([b[0] ^ 0xFF]))
+    with pytest.raises(ValueError, match="hash mismatch"):
+        load_bundle(path)
+
+
+def test_registry_skips_a_rewrite_of_the_live_bundle(trained, tmp_path):
+    model, scaler, _ = trained
+    path = str(tmp_path / BUNDLE_NAME)
+    write_bundle(path, model, scaler)
+    reg = ModelRegistry(str(tmp_path), log=lambda msg: None)
+    version = reg.active[2]
+    assert version is not None and reg.reloads == 1
+
+    write_bundle(path, model, scaler)           # same content, new mtime
+    os.utime(path, ns=(1, 1))
+    assert reg.check() is False and reg.reloads == 1 and reg.active[2] == version
+
+    model2 = xgb.XGBClassifier(n_estimators=10, max_depth=2).fit(
+        scaler.transform(trained[2]), pd.read_csv(DATA)["Outcome"])
+    write_bundle(path, model2, scaler)
+    assert reg.check() is True and reg.active[2] != version
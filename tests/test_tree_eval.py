@@ -0,0 +1,78 @@
+"""TreePredictor parity with XGBoost, and the small-batch predict_proba route."""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+from sklearn.preprocessing import StandardScaler
+
+from model_io import FEATURES, TREE_EVAL_MAX_ROWS, load_bundle, predict_proba, write_bundle
+from tree_eval import TreePredictor
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "diabetes.csv")
+
+
+@pytest.fixture(scope="module")
+def trained():
+    df = pd.read_csv(DATA)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    model = xgb.XGBClassifier(n_estimators=60, max_depth=4, learning_rate=0.1)
+    model.fit(scaler.transform(X), df["Outcome"])
+    return model, scaler, X
+
+
+def _xgb_proba(model, scaler, X):
+    return model.predict_proba(scaler.transform(X))[:, 1]
+
+
+def test_parity_with_xgboost(trained):
+    model, scaler, X = trained
+    got = TreePredictor.from_model(model, scaler).predict(X)
+    assert np.abs(got - _xgb_proba(model, scaler, X)).max() < 1e-5
+
+
+def test_parity_with_missing_values(trained):
+    model, scaler, X = trained
+    X = X[:200].copy()
+    X[::3, 1] = np.nan
+    X[1::4, 5] = np.nan
+    got = TreePredictor.from_model(model, scaler).predict(X)
+    assert np.abs(got - _xgb_proba(model, scaler, X)).max() < 1e-5
+
+
+def test_parity_with_a_bundle(trained, tmp_path):
+    model, scaler, X = trained
+    path = str(tmp_path / "model.bundle")
+    write_bundle(path, model, scaler)
+    bundled = load_bundle(path)
+    got = TreePredictor.from_model(bundled).predict(X)
+    assert np.abs(got - _xgb_proba(model, scaler, X)).max() < 1e-5
+
+
+def test_small_batches_route_through_the_trees(trained):
+    model, scaler, X = trained
+    small, large = X[:TREE_EVAL_MAX_ROWS], X[:TREE_EVAL_MAX_ROWS + 1]
+    assert np.abs(predict_proba(model, scaler, small) - _xgb_proba(model, scaler, small)).max() < 1e-5
+    assert np.abs(predict_proba(model, scaler, large) - _xgb_proba(model, scaler, large)).max() < 1e-5
+
+
+def _per_call(fn, row, n):
+    fn(row)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(row)
+    return (time.perf_counter() - t0) / n
+
+
+def test_single_row_is_faster_than_xgboost(trained):
+    model, scaler, X = trained
+    tp = TreePredictor.from_model(model, scaler)
+    row = X[:1]
+    xgb_s = min(_per_call(lambda r: _xgb_proba(model, scaler, r), row, 100) for _ in range(3))
+    np_s = min(_per_call(tp.predict, row, 500) for _ in range(3))
+    assert np_s < xgb_s
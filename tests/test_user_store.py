@@ -0,0 +1,61 @@
+"""JsonUserStore under concurrent writers, and its file handling."""
+
+import json
+import multiprocessing as mp
+import os
+import stat
+import threading
+
+import pytest
+
+from auth.user_store import JsonUserStore
+
+
+def _register(path, proc, users, threads):
+    store = JsonUserStore(path)
+
+    def run(t):
+        for i in range(t, users, threads):
+            assert store.add_user(f"p{proc}_u{i}", {"password_hash": "x", "predictions": []})
+    ts = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+
+
+def test_no_users_lost_across_processes_and_threads(tmp_path):
+    procs, users, threads = 4, 50, 4
+    path = str(tmp_path / "user_db.json")
+    JsonUserStore(path).initialize()
+    ps = [mp.Process(target=_register, args=(path, p, users, threads)) for p in range(procs)]
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join(timeout=120)
+    assert [p.exitcode for p in ps] == [0] * procs
+    with open(path) as f:
+        db = json.load(f)
+    assert len(db["users"]) == procs * users
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+
+def test_cached_reads_see_other_writers(tmp_path):
+    path = str(tmp_path / "user_db.json")
+    a, b = JsonUserStore(path), JsonUserStore(path)
+    a.initialize()
+    assert b.get_user("ann") is None
+    a.add_user("ann", {"password_hash": "h1", "predictions": []})
+    assert b.get_user("ann")["password_hash"] == "h1"
+    a.set_password_hash("ann", "h2")
+    assert b.get_user("ann")["password_hash"] == "h2"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_rewrite_keeps_the_file_mode(tmp_path):
+    path = str(tmp_path / "user_db.json")
+    store = JsonUserStore(path)
+    store.initialize()
+    os.chmod(path, 0o640)
+    store.add_user("ann", {"password_hash": "x", "predictions": []})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
@@ -0,0 +1,185 @@
+"""
+Native-NumPy evaluator for the trained XGBoost booster.
+
+The booster's trees are flattened into concatenated node arrays with the
+StandardScaler folded into each split threshold, so raw (unscaled) features
+go straight in and no DMatrix is built per call. model_io.predict_proba
+uses it for batches of up to TREE_EVAL_MAX_ROWS rows, where it is faster than
+XGBoost's own predict.
+
+    python tree_eval.py              # parity check vs predict_proba + latency
+"""
+
+import json
+import time
+
+import numpy as np
+
+
+# ---- Export ----
+def _base_margin(learner):
+    """Initial margin from the learner's base_score (stored as a probability)."""
+    raw = learner["learner_model_param"]["base_score"].strip("[]")
+    p = float(raw.split(",")[0])
+    if learner["objective"]["name"] != "binary:logistic":
+        return p
+    return float(np.log(p / (1 - p)))
+
+
+def fold_thresholds(split, mean, scale):
+    """Raw-space thresholds T with `x < T` ⇔ float32((x - mean) / scale) < split.
+
+    XGBoost compares float32 features against float32 splits, and hist splits
+    sit exactly on observed values, so the naive `split * scale + mean` flips
+    rows on the boundary. Bisect each threshold down to adjacent float64s.
+    """
+    split = split.astype(np.float32)
+    f = lambda x: ((x - mean) / scale).astype(np.float32)
+    t0 = split.astype(np.float64) * scale + mean
+    step = np.maximum(np.abs(t0), 1.0) * 1e-6
+    lo, hi = t0 - step, t0 + step
+    for _ in range(40):
+        bad_lo, bad_hi = f(lo) >= split, f(hi) < split
+        if not (bad_lo.any() or bad_hi.any()):
+            break
+        step *= 2
+        lo = np.where(bad_lo, t0 - step, lo)
+        hi = np.where(bad_hi, t0 + step, hi)
+    for _ in range(64):
+        mid = lo + (hi - lo) / 2
+        up = f(mid) >= split
+        hi, lo = np.where(up, mid, hi), np.where(up, lo, mid)
+    return hi
+
+
+def flatten_booster(booster, scaler=None):
+    """Flatten an xgboost Booster (+ optional StandardScaler) into NumPy node arrays."""
+    model = json.loads(booster.save_raw("json"))
+    learner = model["learner"]
+    trees = learner["gradient_booster"]["model"]["trees"]
+    n_trees = len(trees)
+    best = learner.get("attributes", {}).get("best_iteration")
+    if best is not None:
+        n_trees = min(n_trees, int(best) + 1)
+
+    mean = np.zeros(int(learner["learner_model_param"]["num_feature"]))
+    scale = np.ones_like(mean)
+    if scaler is not None:
+        mean, scale = np.asarray(scaler.mean_, float), np.asarray(scaler.scale_, float)
+
+    feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    depth, offset = 0, 0
+    for tree in trees[:n_trees]:
+        lc = np.asarray(tree["left_children"], np.int32)
+        rc = np.asarray(tree["right_children"], np.int32)
+        f  = np.asarray(tree["split_indices"], np.int32)
+        s  = np.asarray(tree["split_conditions"], np.float32)
+        leaf = lc == -1
+        ids = np.arange(len(lc), dtype=np.int32)
+
+        feature.append(np.where(leaf, 0, f))
+        threshold.append(np.where(leaf, np.inf, fold_thresholds(s, mean[f], scale[f])))
+        # leaves loop onto themselves so every row can take `depth` steps
+        left.append(np.where(leaf, ids, lc) + offset)
+        right.append(np.where(leaf, ids, rc) + offset)
+        default_left.append(np.asarray(tree["default_left"], bool))
+        value.append(np.where(leaf, s.astype(np.float64), 0.0))
+        roots.append(offset)
+
+        # depth of the deepest leaf in this tree
+        d = np.zeros(len(lc), np.int32)
+        for i in ids:
+            if not leaf[i]:
+                d[lc[i]] = d[rc[i]] = d[i] + 1
+        depth = max(depth, int(d.max()))
+        offset += len(lc)
+
+    return dict(
+        feature=np.concatenate(feature), threshold=np.concatenate(threshold),
+        left=np.concatenate(left), right=np.concatenate(right),
+        default_left=np.concatenate(default_left), value=np.concatenate(value),
+        roots=np.asarray(roots, np.int32), depth=np.int32(depth),
+        base_margin=np.float64(_base_margin(learner)),
+    )
+
+
+# ---- Evaluation ----
+class TreePredictor:
+    """Evaluate flattened trees on raw feature rows; mirrors XGBClassifier.predict_proba."""
+
+    def __init__(self, arrays):
+        self.feature      = arrays["feature"]
+        self.threshold    = arrays["threshold"]
+        self.left         = arrays["left"]
+        self.right        = arrays["right"]
+        self.default_left = arrays["default_left"]
+        self.value        = arrays["value"]
+        self.roots        = arrays["roots"]
+        self.depth        = int(arrays["depth"])
+        self.base_margin  = float(arrays["base_margin"])
+
+    @classmethod
+    def from_model(cls, model, scaler=None):
+        if hasattr(model, "get_booster"):
+            booster = model.get_booster()
+        else:
+            booster = getattr(model, "booster", model)   # BundledModel or raw Booster
+        return cls(flatten_booster(booster, scaler))
+
+    def margin(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            v = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(v), self.default_left[nodes], v < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.base_margin + self.value[nodes].sum(axis=1)
+
+    def predict(self, X):
+        """P(diabetes) for each raw feature row."""
+        return 1.0 / (1.0 + np.exp(-self.margin(X)))
+
+    def predict_proba(self, X):
+        p = self.predict(X)
+        return np.column_stack([1 - p, p])
+
+
+# ---- Parity check / microbenchmark ----
+def _per_call_us(fn, row, n):
+    fn(row)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(row)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    import pandas as pd
+    from model_io import FEATURES, TREE_EVAL_MAX_ROWS, load_artifacts, predict_proba
+
+    model, scaler = load_artifacts()
+    tp = TreePredictor.from_model(model, scaler)
+    # XGBoost's own path (model_io.predict_proba routes small batches through `tp`)
+    xgb_proba = lambda X: model.predict_proba(X if scaler is None else scaler.transform(X))[:, 1]
+
+    X = pd.read_csv("diabetes.csv")[FEATURES].to_numpy(dtype=np.float64)
+    ref = xgb_proba(X)
+    got = tp.predict(X)
+    err = np.abs(ref - got).max()
+    print(f"Parity on {len(X)} rows: max |Δp| = {err:.2e}")
+    if err > 1e-5:
+        raise SystemExit("tree evaluator disagrees with predict_proba")
+
+    row = X[:1]
+    xgb_us = _per_call_us(xgb_proba, row, 500)
+    np_us  = _per_call_us(tp.predict, row, 5000)
+    print(f"Single-row latency: predict_proba {xgb_us:,.1f} µs · "
+          f"TreePredictor {np_us:,.1f} µs ({xgb_us / np_us:.1f}× faster)")
+    small = X[:TREE_EVAL_MAX_ROWS]
+    if np.abs(predict_proba(model, scaler, small) - xgb_proba(small)).max() > 1e-5:
+        raise SystemExit("predict_proba small-batch path disagrees with XGBoost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Parallel hyperparameter search for the XGBoost diabetes model.
+
+Every (candidate, CV fold) fit is a task on a process pool. Each worker pins
+XGBoost to `cpu_count // n_jobs` threads so the pool doesn't oversubscribe
+the machine. Each fit early-stops on log loss over a small validation split
+carved out of its training folds (STOP_FRACTION), never on the fold it is
+scored on, so `n_estimators` is an upper bound rather than a fixed size. The
+round count handed back for the final refit is the mean stopping point, but
+at least MIN_ROUNDS.
+
+By default fits use `tree_method="hist"` on QuantileDMatrix inputs. Tasks
+are queued fold by fold, so a worker keeps getting the same fold: it
+quantises that fold once, reuses it for every candidate, and drops it when
+it moves on to the next fold. Each worker holds one fold's matrices at a
+time, so memory grows with n_jobs, not n_jobs × folds.
+
+Strategies:
+    grid     exhaustive PARAM_GRID (same space as GridSearchCV in train_xgboost)
+    random   `n_iter` samples from PARAM_SPACE
+    halving  successive halving over random samples, boosting rounds as the budget
+
+    python tuning.py --strategy compare      # wall time + best AUC per strategy
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, StratifiedShuffleSplit
+
+PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [3, 6, 9],
+    'learning_rate': [0.01, 0.1],
+    'subsample': [0.7, 0.9]
+}
+
+PARAM_SPACE = {
+    'max_depth':        lambda r: r.randint(2, 9),
+    'learning_rate':    lambda r: 10 ** r.uniform(-2, -0.5),
+    'subsample':        lambda r: r.uniform(0.6, 1.0),
+    'colsample_bytree': lambda r: r.uniform(0.6, 1.0),
+    'min_child_weight': lambda r: r.choice([1, 2, 5, 10]),
+}
+
+EARLY_STOPPING_ROUNDS = 20
+MIN_ROUNDS = 50
+MAX_ROUNDS = 300
+STOP_FRACTION = 0.15      # share of each training fold used to decide when to stop
+MAX_BIN = 256
+
+_W = {}   # per-worker state: X, y, folds, nthread, quantile, (fold, matrices) of the current fold
+
+
+# ---- Worker side ----
+def _init_worker(X, y, folds, nthread, quantile):
+    os.environ["OMP_NUM_THREADS"] = str(nthread)
+    _W.update(X=X, y=y, folds=folds, nthread=nthread, quantile=quantile, dm=None)
+
+
+def _fold_matrices(fold):
+    """(dtrain, dstop, dval) for `fold`; quantised matrices are reused until the
+    worker moves on to another fold."""
+    import xgboost as xgb
+    if _W["dm"] is not None and _W["dm"][0] == fold:
+        return _W["dm"][1]
+    _W["dm"] = None                      # free the previous fold before building this one
+    tr, st, va = _W["folds"][fold]
+    X, y = _W["X"], _W["y"]
+    if _W["quantile"]:
+        dtrain = xgb.QuantileDMatrix(X[tr], label=y[tr], max_bin=MAX_BIN, nthread=_W["nthread"])
+        dstop  = xgb.QuantileDMatrix(X[st], label=y[st], ref=dtrain, nthread=_W["nthread"])
+        dval   = xgb.QuantileDMatrix(X[va], label=y[va], ref=dtrain, nthread=_W["nthread"])
+        _W["dm"] = (fold, (dtrain, dstop, dval))
+        return dtrain, dstop, dval
+    return tuple(xgb.DMatrix(X[i], label=y[i], nthread=_W["nthread"]) for i in (tr, st, va))
+
+
+def _fit_fold(params, fold, rounds):
+    """Train on all folds but `fold`, early-stopping on the fold's stop split.
+    Returns (AUC on `fold`, best_iteration)."""
+    import xgboost as xgb
+    va = _W["folds"][fold][2]
+    dtrain, dstop, dval = _fold_matrices(fold)
+    method = {"tree_method": "hist", "max_bin": MAX_BIN} if _W["quantile"] else {}
+    booster = xgb.train(
+        {"objective": "binary:logistic", "eval_metric": "logloss", "seed": 42,
+         "nthread": _W["nthread"], **method, **params},
+        dtrain, num_boost_round=rounds, evals=[(dstop, "stop")],
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+    p = booster.predict(dval, iteration_range=(0, booster.best_iteration + 1))
+    return roc_auc_score(_W["y"][va], p), booster.best_iteration
+
+
+def _cv_folds(y, cv, seed=42):
+    """[(train, stop, val)] index triples: stratified K-fold, with a stratified
+    STOP_FRACTION of each training side held back for early stopping."""
+    folds = []
+    for tr, va in StratifiedKFold(n_splits=cv).split(np.zeros(len(y)), y):
+        inner = StratifiedShuffleSplit(n_splits=1, test_size=STOP_FRACTION, random_state=seed)
+        fit, stop = next(inner.split(np.zeros(len(tr)), y[tr]))
+        folds.append((tr[fit], tr[stop], va))
+    return folds
+
+
+# ---- Search driver ----
+class Tuner:
+    """Runs CV fits for candidate parameter sets on a shared process pool."""
+
+    def __init__(self, X, y, cv=5, n_jobs=None, quantile=True):
+        self.quantile = quantile
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.asarray(y)
+        self.folds = _cv_folds(self.y, cv)
+        cpus = os.cpu_count() or 1
+        self.n_jobs = max(1, min(n_jobs or cpus, cpus))
+        self.nthread = max(1, cpus // self.n_jobs)
+        self.fits = 0
+
+    def __enter__(self):
+        self.pool = ProcessPoolExecutor(
+            self.n_jobs, mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.X, self.y, self.folds, self.nthread, self.quantile))
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown()
+
+    def evaluate(self, candidates, rounds=None):
+        """(mean CV AUC, refit rounds, candidate) for every candidate dict."""
+        specs = [({k: v for k, v in c.items() if k != "n_estimators"},
+                  rounds or c.get("n_estimators", MAX_ROUNDS)) for c in candidates]
+        # fold-major order: consecutive tasks share a fold, so workers rarely re-quantise
+        jobs = [[self.pool.submit(_fit_fold, params, f, n) for params, n in specs]
+                for f in range(len(self.folds))]
+        self.fits += len(specs) * len(self.folds)
+        out = []
+        for i, c in enumerate(candidates):
+            res = [fold_jobs[i].result() for fold_jobs in jobs]
+            out.append((float(np.mean([a for a, _ in res])),
+                        max(MIN_ROUNDS, int(round(np.mean([b for _, b in res]))) + 1), c))
+        return out
+
+
+def _grid_candidates(grid):
+    keys = list(grid)
+    return [dict(zip(keys, v)) for v in itertools.product(*grid.values())]
+
+
+def _random_candidates(n, seed):
+    r = random.Random(seed)
+    return [{k: f(r) for k, f in PARAM_SPACE.items()} for _ in range(n)]
+
+
+def _halving(tuner, candidates, min_rounds, max_rounds, eta):
+    rounds = min_rounds
+    scored = []
+    while True:
+        scored = sorted(tuner.evaluate(candidates, rounds), key=lambda t: -t[0])
+        if len(candidates) <= 1 or rounds >= max_rounds:
+            return scored
+        candidates = [c for _, _, c in scored[:max(1, len(scored) // eta)]]
+        rounds = min(max_rounds, rounds * eta)
+
+
+def tune(X, y, strategy="grid", n_iter=24, cv=5, n_jobs=None, seed=42, quantile=True, log=print):
+    """Search hyperparameters. Returns a result dict with best params and timing."""
+    t0 = time.perf_counter()
+    with Tuner(X, y, cv, n_jobs, quantile) as tuner:
+        if strategy == "grid":
+            scored = tuner.evaluate(_grid_candidates(PARAM_GRID))
+        elif strategy == "random":
+            scored = tuner.evaluate(_random_candidates(n_iter, seed), MAX_ROUNDS)
+        elif strategy == "halving":
+            n = max(n_iter, 27)
+            scored = _halving(tuner, _random_candidates(n, seed),
+                              min_rounds=max(1, MAX_ROUNDS // 9), max_rounds=MAX_ROUNDS, eta=3)
+        else:
+            raise ValueError(f"Unknown strategy {strategy!r}")
+        fits = tuner.fits
+    auc, best_iter, params = max(scored, key=lambda t: t[0])
+    method = {"tree_method": "hist", "max_bin": MAX_BIN} if quantile else {}
+    result = {"strategy": strategy, "best_auc": auc,
+              "best_params": {**params, **method, "n_estimators": best_iter},
+              "wall_time": time.perf_counter() - t0, "fits": fits}
+    log(f"[{strategy}] AUC {auc:.4f} · {result['wall_time']:.1f}s · {fits} fits · "
+        f"{result['best_params']}")
+    return result
+
+
+def compare(X, y, strategies=("grid", "random", "halving"), **kw):
+    """Run several strategies back to back and print a summary table."""
+    results = [tune(X, y, s, **kw) for s in strategies]
+    print(f"\n{'strategy':<10}{'best AUC':>10}{'wall s':>10}{'fits':>8}")
+    for r in results:
+        print(f"{r['strategy']:<10}{r['best_auc']:>10.4f}{r['wall_time']:>10.1f}{r['fits']:>8}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    from advanced_diabetes_predictor import load_data
+
+    ap = argparse.ArgumentParser(description="Tune the XGBoost diabetes model.")
+    ap.add_argument("--strategy", default="compare",
+                    choices=["grid", "random", "halving", "compare"])
+    ap.add_argument("--n-iter", type=int, default=24)
+    ap.add_argument("--n-jobs", type=int, default=None)
+    ap.add_argument("--no-quantile", action="store_true",
+                    help="rebuild a float DMatrix per fit (default tree method) instead")
+    args = ap.parse_args()
+
+    X_train, _, y_train, _, _, _ = load_data()
+    kw = dict(n_iter=args.n_iter, n_jobs=args.n_jobs, quantile=not args.no_quantile)
+    if args.strategy == "compare":
+        compare(X_train, y_train, **kw)
+    else:
+        tune(X_train, y_train, args.strategy, **kw)
@@ -0,0 +1,46 @@
+"""
+What-if risk grids: model probabilities over glucose × BMI (× age).
+
+Every other feature is held at the patient's submitted value. The whole grid
+(a few thousand rows) is scored in one batch call — the local model or the
+scoring service — so the app can render it as a contour map and explore it
+client-side without another model call per slider tick.
+"""
+
+import numpy as np
+
+from model_io import FEATURES
+
+GLUCOSE_AXIS = np.arange(50, 301, 5, dtype=np.float64)     # form slider range
+BMI_AXIS     = np.arange(15, 55.5, 1, dtype=np.float64)
+AGE_OFFSETS  = (-20, -10, 0, 10, 20)
+
+_GLU, _BMI, _AGE = (FEATURES.index(f) for f in ("Glucose", "BMI", "Age"))
+
+
+def age_axis(age, offsets=AGE_OFFSETS):
+    """Ages around the patient's own, clipped to the form's 1–100 range."""
+    return np.unique(np.clip(np.asarray(offsets, dtype=np.float64) + age, 1, 100))
+
+
+def grid_features(row, glucose=GLUCOSE_AXIS, bmi=BMI_AXIS, ages=None):
+    """(X, shape): the feature rows of the grid and its (ages, bmi, glucose) shape.
+
+    `row` is the patient's 8 features in FEATURES order; `ages` defaults to
+    just their own age.
+    """
+    ages = np.array([row[_AGE]], dtype=np.float64) if ages is None else np.asarray(ages, np.float64)
+    A, B, G = np.meshgrid(ages, bmi, glucose, indexing="ij")
+    X = np.repeat(np.asarray(row, dtype=np.float64)[None, :], A.size, axis=0)
+    X[:, _GLU], X[:, _BMI], X[:, _AGE] = G.ravel(), B.ravel(), A.ravel()
+    return X, A.shape
+
+
+def risk_grid(score_rows, row, glucose=GLUCOSE_AXIS, bmi=BMI_AXIS, ages=None):
+    """Probability grid of shape (len(ages), len(bmi), len(glucose)).
+
+    `score_rows(X)` returns one probability per row of X, e.g.
+    `lambda X: predict_proba(model, scaler, X)` or RemoteScorer.probabilities.
+    """
+    X, shape = grid_features(row, glucose, bmi, ages)
+    return np.asarray(score_rows(X)).reshape(shape)